@@ -2,35 +2,48 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import importlib
+import inspect
 import logging
 import os
 import textwrap
 import warnings
 from dataclasses import dataclass
-from typing import Any, Dict, List, Type, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Final,
+    List,
+    Type,
+    Optional,
+    Tuple,
+    get_type_hints,
+)
 from pydantic import BaseModel, Field
 
 from google.adk import Agent
 from google.adk.tools import FunctionTool
 from google.adk.tools import ToolContext
 
-from tools import (
-    CancelRecordInput,
-    CancelRecordTool,
-    CreateRecordInput,
-    CreateRecordTool,
-    DirectionsInput,
-    DirectionsTool,
-    DoctorsInput,
-    DoctorsTool,
-    ListRecordsInput,
-    ListRecordsTool,
-    ScheduleInput,
-    ScheduleTool,
-    ServicesInput,
-    ServicesTool,
-)
-from tools import resolve_entities, check_availability
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from types import ModuleType
+
+# The ``tools`` module pulls in the HTTP client and loads the routing KB, so it
+# is imported on first use rather than when ``agent`` is imported.
+_TOOLS_MODULE: Optional["ModuleType"] = None
+
+
+def _tools() -> "ModuleType":
+    """Import :mod:`tools` once and return it."""
+
+    global _TOOLS_MODULE
+    if _TOOLS_MODULE is None:
+        _TOOLS_MODULE = importlib.import_module("tools")
+    return _TOOLS_MODULE
 
 # ---------------------------------------------------------------------------
 # FunctionTool schemas and top-level wrappers for new KB helpers
@@ -59,7 +72,8 @@ def _ft_resolve_entities(
     if not isinstance(query, str) or not query.strip():
         return {"status": "not_found", "entities": []}
 
-    return resolve_entities(query)
+    # ``tools.resolve_entities`` folds the query and memoizes per folded form.
+    return _tools().resolve_entities(query)
 
 
 class CheckAvailabilityInput(BaseModel):
@@ -71,23 +85,13 @@ class CheckAvailabilityInput(BaseModel):
     date_to: Optional[str] = Field(default=None, description="Дата заканчэння (ISO)")
 
 
-def _ft_check_availability(
-    payload: CheckAvailabilityInput,
-) -> Dict[str, Any]:
-    """Return example free slot(s) for doctor(s).
+AvailabilityArgs = Tuple[List[str], int, Optional[str], Optional[str]]
 
-    Accepts either a Pydantic model or a plain dict payload.
-    """
-    if isinstance(payload, dict):
-        doctor_ids = payload.get("doctor_ids") or []
-        duration_min = payload.get("duration_min") or 0
-        date_from = payload.get("date_from")
-        date_to = payload.get("date_to")
-    else:
-        doctor_ids = getattr(payload, "doctor_ids", []) or []
-        duration_min = getattr(payload, "duration_min", 0) or 0
-        date_from = getattr(payload, "date_from", None)
-        date_to = getattr(payload, "date_to", None)
+
+def _coerce_availability_args(
+    doctor_ids: Any, duration_min: Any, date_from: Any, date_to: Any
+) -> AvailabilityArgs:
+    """Normalize loosely typed availability arguments."""
 
     if isinstance(doctor_ids, (set, tuple)):
         doctor_ids = list(doctor_ids)
@@ -100,7 +104,46 @@ def _ft_check_availability(
     except Exception:
         duration_min = 0
 
-    return check_availability(
+    return doctor_ids, duration_min, date_from, date_to
+
+
+@functools.singledispatch
+def _availability_args(payload: Any) -> AvailabilityArgs:
+    """Extract availability arguments; specialized per payload type below."""
+
+    return _coerce_availability_args(
+        getattr(payload, "doctor_ids", []) or [],
+        getattr(payload, "duration_min", 0) or 0,
+        getattr(payload, "date_from", None),
+        getattr(payload, "date_to", None),
+    )
+
+
+@_availability_args.register(dict)
+def _(payload: Dict[str, Any]) -> AvailabilityArgs:
+    return _coerce_availability_args(
+        payload.get("doctor_ids") or [],
+        payload.get("duration_min") or 0,
+        payload.get("date_from"),
+        payload.get("date_to"),
+    )
+
+
+@_availability_args.register(CheckAvailabilityInput)
+def _(payload: CheckAvailabilityInput) -> AvailabilityArgs:
+    # The validated model already guarantees ``List[str]`` and ``int``.
+    return payload.doctor_ids, payload.duration_min, payload.date_from, payload.date_to
+
+
+def _ft_check_availability(
+    payload: CheckAvailabilityInput,
+) -> Dict[str, Any]:
+    """Return example free slot(s) for doctor(s).
+
+    Accepts either a Pydantic model or a plain dict payload.
+    """
+    doctor_ids, duration_min, date_from, date_to = _availability_args(payload)
+    return _tools().check_availability(
         doctor_ids,
         duration_min,
         date_from=date_from,
@@ -121,36 +164,27 @@ DEFAULT_MODEL = os.getenv("AMEDIS_AGENT_MODEL", "gemini-2.5-flash")
 DEFAULT_AGENT_NAME = os.getenv("AMEDIS_AGENT_NAME", "amedis_online_agent")
 
 
-GLOBAL_INSTRUCTION = textwrap.dedent(
-    """
-    Ты — ветлівы і дакладны віртуальны рэгістратар медцэнтра Amedis. Твая задача —
-    дапамагаць пацыентам кіраваць запісамі: падбіраць напрамкі, доктараў, паслугі,
-    часавыя слоты, а таксама пераглядаць або адмяняць існыя запісы.
-    Размаўляй ветліва, выкарыстоўвай коратка сфармуляваныя адказы і
-    падтрымлівай упэўнены прафесійны тон.
-    """
-)
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "y"}
 
 
-AGENT_INSTRUCTION = textwrap.dedent(
-    """
-    Вядзі дыялог па кроках:
-    1. Спачатку спытай чым дапамагчы
-    2. Перад выкарыстаннем інструментаў правер, ці ёсць патрэбныя параметры. Калі карыстальнік іх не даў, выкарыстоўвай па змаўчанні: base_url з налад агента і гасцявы token. Не прасі іх без неабходнасці.
-    3. Для атрымання даведачнай інфармацыі выкарыстоўвай адпаведныя інструменты:
-       directions → doctors → services → schedule. Не пераблытай парадак і
-       заўсёды паведамляй, як абраць патрэбны ID або слот.
-    4. Для працы з запісамі выкарыстоўвай list_records, cancel_record і
-       create_record. Пры стварэнні запісу ўдакладні каментар (калі патрэбна) і
-       пацвярджэнне карыстальніка.
-    6. Адказвай толькі фактамі, атрыманыя з інструментаў, або пытаннямі для
-       ўдакладнення. Калі адбываецца памылка, апішы, што пайшло не так, і
-       прапануй наступныя крокі.
-    5. Не размаўляй на іншыя тэмы, акрамя кіравання запісамі.
-    """
-)
+# Optional tool groups, toggled per deployment instead of per module copy.
+ENABLE_HAR_TOOL: bool = _env_flag("AMEDIS_ENABLE_HAR", False)
+ENABLE_KB_TOOLS: bool = _env_flag("AMEDIS_ENABLE_KB_TOOLS", True)
+_FLASH_PREFIX = "gemini-2.5-flash"
+_SUPPORTED_MODEL_FAMILIES: Final[frozenset] = frozenset({_FLASH_PREFIX})
+
+
+def _model_family(model: str) -> str:
+    """Return the ``<vendor>-<version>-<tier>`` prefix of a model name."""
+
+    parts = model.split("-", 3)
+    return "-".join(parts[:3]) if len(parts) >= 3 else model
+
 
-# Override prompts with clean guidance for the new KB + tools
 GLOBAL_INSTRUCTION = textwrap.dedent(
     """
     Ты — асістэнт для запісу да ўрача ў сістэме Amedis. Падтрымлівай ветлівы і кароткі стыль, дзейнічай па кроках.
@@ -173,7 +207,7 @@ AGENT_INSTRUCTION = textwrap.dedent(
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentSettings:
     """Наладкі агента Amedis для ініцыялізацыі ADK-агента."""
 
@@ -183,13 +217,26 @@ class AgentSettings:
 
     def __post_init__(self) -> None:
         self.name = self.name.strip()
-        self.model = self.model.strip()
         self.base_url = self.base_url.strip()
-        if self.model and not self.model.startswith("gemini-2.5-flash"):
-            logger.warning(
-                "Выкарыстоўваецца мадэль па-за сямействам gemini-2.5-flash: %s",
-                self.model,
-            )
+        self.model = _checked_model(self.model)
+
+
+@functools.lru_cache(maxsize=32)
+def _checked_model(model: str) -> str:
+    """Strip a model name and warn once if it is outside supported families.
+
+    Memoized so the check runs lazily on first use (after logging is set up)
+    and each distinct model is reported only once per process.
+    """
+
+    model = model.strip()
+    if model and _model_family(model) not in _SUPPORTED_MODEL_FAMILIES:
+        logger.warning(
+            "Выкарыстоўваецца мадэль па-за сямействам %s: %s",
+            _FLASH_PREFIX,
+            model,
+        )
+    return model
 
 
 def _with_default_base_url(
@@ -199,29 +246,45 @@ def _with_default_base_url(
 
     # Handle plain dict payloads coming from ADK before model coercion
     if isinstance(payload, dict):
-        try:
-            updated = dict(payload)
-            if not updated.get("base_url"):
-                updated["base_url"] = base_url
-            return updated
-        except Exception:  # pragma: no cover - defensive
-            logger.debug("Не атрымалася апрацаваць dict payload для %s", tool_name)
-
-    if hasattr(payload, "copy") and hasattr(payload, "base_url"):
-        try:
-            return payload.copy(update={"base_url": payload.base_url or base_url})
-        except Exception:  # pragma: no cover - defensive
-            logger.debug("Не атрымалася скапіраваць payload для %s", tool_name)
-    # Try to set attribute even if the model doesn't define the field
+        if payload.get("base_url"):
+            return payload
+        return {**payload, "base_url": base_url}
+    if getattr(payload, "base_url", None):
+        return payload
+    # Default the field in place instead of a validating ``copy(update=...)``
+    # round-trip; this also covers models that do not declare the field.
     try:
-        current = getattr(payload, "base_url", None)
-        if not current:
-            object.__setattr__(payload, "base_url", base_url)
+        object.__setattr__(payload, "base_url", base_url)
     except Exception:  # pragma: no cover - defensive
         logger.debug("Не атрымалася задаць base_url для %s", tool_name)
     return payload
 
 
+def _serializer_for(output_type: Any) -> Optional[Callable[[Any], Any]]:
+    """Return the dump method for a result type, preferring Pydantic v2."""
+
+    if hasattr(output_type, "model_dump"):
+        return output_type.model_dump
+    if hasattr(output_type, "dict"):
+        return output_type.dict
+    return None
+
+
+def _declared_serializer(tool_impl: Any) -> Optional[Callable[[Any], Any]]:
+    """Resolve the serializer from the return annotation of ``tool_impl.call``."""
+
+    try:
+        output_type = get_type_hints(tool_impl.call).get("return")
+    except Exception:
+        return None
+    if not isinstance(output_type, type):
+        return None
+    return _serializer_for(output_type)
+
+
+# Enough for every tool against a handful of base URLs; the bound keeps a
+# long-lived process that varies base_url from growing without limit.
+@functools.lru_cache(maxsize=64)
 def _wrap_tool(
     *,
     tool_impl: Any,
@@ -230,106 +293,163 @@ def _wrap_tool(
     name: str,
     description: str,
 ) -> FunctionTool:
-    """Build a FunctionTool wrapper around the legacy tool implementation."""
+    """Build a FunctionTool wrapper around the legacy tool implementation.
 
-    def _call(payload) -> Dict[str, Any]:
-        # Coerce dict payloads to the tool's Pydantic input model first
-        obj = payload
+    ADK derives (and caches) the function declaration from the wrapped
+    callable itself, so wrappers are memoized per ``(tool, base_url)`` and
+    repeated ``build_agent`` calls reuse the already introspected tools.
+    """
+
+    # Resolved once per tool; falls back to probing the first result.
+    serializer = _declared_serializer(tool_impl)
+    # Constant part of the error response, built once per wrapper.
+    err_suffix: Dict[str, str] = {"tool": name}
+    # Tools exposing a coroutine variant skip the worker-thread hop, but only
+    # while the loop owns a long-lived async HTTP client (chat_cli opens one
+    # for its dialogue). Other loops, e.g. Runner.run's fresh loop per turn,
+    # keep using the pooled keep-alive requests session via the sync path.
+    acall = getattr(tool_impl, "acall", None)
+    prefer_acall = _tools().prefer_acall
+
+    async def _call(payload) -> Dict[str, Any]:
+        nonlocal serializer
+        # Coerce dict payloads to the tool's Pydantic input model in a single
+        # validation pass, with the agent's base URL already injected.
         if isinstance(payload, dict):
+            data = {**payload, "base_url": payload.get("base_url") or base_url}
             try:
-                obj = input_type(**payload)
+                prepared = input_type(**data)
             except Exception:  # pragma: no cover - defensive guard
                 logger.debug("Не атрымалася сканструяваць %s з dict payload", input_type)
-                obj = payload
-
-        prepared = _with_default_base_url(obj, base_url=base_url, tool_name=name)
+                prepared = data
+        else:
+            prepared = _with_default_base_url(payload, base_url=base_url, tool_name=name)
         try:
-            result = tool_impl.call(prepared)
+            if acall is not None and prefer_acall():
+                # Native async tools await their backend calls on the loop.
+                result = await acall(prepared)
+            else:
+                # Blocking backend I/O runs off the event loop so ADK can fan
+                # out several tool calls from one model turn concurrently.
+                result = await asyncio.to_thread(tool_impl.call, prepared)
         except Exception as exc:  # pragma: no cover - network/IO defensive guard
-            logger.exception("Памылка падчас выканання інструмента %s", name)
-            return {
-                "error": str(exc),
-                "tool": name,
-            }
-        if hasattr(result, "dict"):
-            return result.dict()
-        if hasattr(result, "model_dump"):
-            return result.model_dump()
-        return result  # pragma: no cover - fallback
+            # Tracebacks are only materialized when DEBUG logging is enabled.
+            logger.error(
+                "Памылка падчас выканання інструмента %s: %s",
+                name,
+                exc,
+                exc_info=logger.isEnabledFor(logging.DEBUG),
+            )
+            return {"error": str(exc), **err_suffix}
+        if serializer is None:
+            serializer = _serializer_for(type(result)) or (lambda value: value)
+        return serializer(result)
 
     _call.__name__ = name
+    _call.__qualname__ = name
     _call.__doc__ = description
-    _call.__annotations__["payload"] = input_type
+    # Publish fully resolved annotations and an explicit signature so ADK's
+    # introspection never has to evaluate the postponed string annotations.
+    _call.__annotations__ = {"payload": input_type, "return": Dict[str, Any]}
+    _call.__signature__ = inspect.Signature(
+        [
+            inspect.Parameter(
+                "payload",
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                annotation=input_type,
+            )
+        ],
+        return_annotation=Dict[str, Any],
+    )
     return FunctionTool(_call)
 
 
 
 
 
+# (input model, tool name, description); the implementation is looked up as
+# ``tools.TOOLS[name]``. Models are named rather than referenced so that
+# :mod:`tools` is only imported on demand.
+_TOOL_SPECS: Final[Tuple[Tuple[str, str, str], ...]] = (
+    (
+        "DirectionsInput",
+        "directions",
+        "Атрымлівае спіс напрамкаў прыёму для пацыента.",
+    ),
+    (
+        "DoctorsInput",
+        "doctors",
+        "Атрымлівае спіс доктараў у межах напрамку.",
+    ),
+    (
+        "ServicesInput",
+        "services",
+        "Пералічвае паслугі, даступныя ў выбраным напрамку.",
+    ),
+    (
+        "ScheduleInput",
+        "schedule",
+        "Знаходзіць свабодныя слоты для доктара і паслугі ў дыяпазоне дат.",
+    ),
+    (
+        "CreateRecordInput",
+        "create_record",
+        "Стварае новы запіс да ўрача па выбраным слоце.",
+    ),
+    (
+        "ListRecordsInput",
+        "list_records",
+        "Паказвае будучыя запісы пацыента.",
+    ),
+    (
+        "CancelRecordInput",
+        "cancel_record",
+        "Змяняе статус запісу на адмяну.",
+    ),
+)
+
+_HAR_TOOL_SPEC: Final[Tuple[str, str, str]] = (
+    "HarAutofillInput",
+    "har_autofill",
+    "Праходзіць па HAR-файле і знаходзіць patientAPIId/Ins_name.",
+)
+
+
+def _tool_impl(name: str) -> Any:
+    """Return the shared instance registered as ``tools.TOOLS[name]``."""
+
+    return _tools().TOOLS[name]
+
+
+@functools.lru_cache(maxsize=None)
+def _function_tool(func: Callable[..., Any]) -> FunctionTool:
+    """Wrap a module-level function once and share it across agents."""
+
+    return FunctionTool(func)
+
+
 def _build_function_tools(settings: AgentSettings) -> List[FunctionTool]:
     """Пабудаваць набор FunctionTool, адаптаваных для ADK агента."""
 
     base_url = settings.base_url
-
-    tool_specs = [
-        (
-            DirectionsTool(),
-            DirectionsInput,
-            "directions",
-            "Атрымлівае спіс напрамкаў прыёму для пацыента.",
-        ),
-        (
-            DoctorsTool(),
-            DoctorsInput,
-            "doctors",
-            "Атрымлівае спіс доктараў у межах напрамку.",
-        ),
-        (
-            ServicesTool(),
-            ServicesInput,
-            "services",
-            "Пералічвае паслугі, даступныя ў выбраным напрамку.",
-        ),
-        (
-            ScheduleTool(),
-            ScheduleInput,
-            "schedule",
-            "Знаходзіць свабодныя слоты для доктара і паслугі ў дыяпазоне дат.",
-        ),
-        (
-            CreateRecordTool(),
-            CreateRecordInput,
-            "create_record",
-            "Стварае новы запіс да ўрача па выбраным слоце.",
-        ),
-        (
-            ListRecordsTool(),
-            ListRecordsInput,
-            "list_records",
-            "Паказвае будучыя запісы пацыента.",
-        ),
-        (
-            CancelRecordTool(),
-            CancelRecordInput,
-            "cancel_record",
-            "Змяняе статус запісу на адмяну.",
-        ),
-    ]
+    tools_module = _tools()
+    specs = _TOOL_SPECS + (_HAR_TOOL_SPEC,) if ENABLE_HAR_TOOL else _TOOL_SPECS
 
     tools: List[FunctionTool] = [
         _wrap_tool(
-            tool_impl=impl,
+            tool_impl=_tool_impl(name),
             base_url=base_url,
-            input_type=input_type,
+            input_type=getattr(tools_module, input_name),
             name=name,
             description=description,
         )
-        for impl, input_type, name, description in tool_specs
+        for input_name, name, description in specs
     ]
 
     # Add top-level function tools with Pydantic schemas
-    tools.append(FunctionTool(_ft_resolve_entities))
-    tools.append(FunctionTool(_ft_check_availability))
+    if ENABLE_KB_TOOLS:
+        tools.append(_function_tool(_ft_resolve_entities))
+        tools.append(_function_tool(_ft_check_availability))
 
     return tools
 
@@ -355,12 +475,48 @@ def build_agent(settings: AgentSettings | None = None) -> Agent:
     )
 
 
-agent = build_agent()
+async def warmup_tools() -> None:
+    """Create every tool implementation and run its optional ``warmup`` hook.
+
+    Hooks run concurrently in worker threads, so one-time setup (KB loading,
+    connection establishment) is paid at startup instead of on the first
+    user request. Failures are logged and never abort the caller.
+    """
+
+    def _warm(name: str) -> None:
+        impl = _tool_impl(name)
+        hook = getattr(impl, "warmup", None)
+        if callable(hook):
+            hook()
+
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_warm, spec[1]) for spec in _TOOL_SPECS),
+        return_exceptions=True,
+    )
+    for spec, result in zip(_TOOL_SPECS, results):
+        if isinstance(result, BaseException):
+            logger.warning("Не атрымалася падрыхтаваць інструмент %s: %s", spec[1], result)
+
+
+@functools.cache
+def get_agent() -> Agent:
+    """Return the default agent, building it on first use."""
+
+    return build_agent()
+
+
+def __getattr__(name: str) -> Any:
+    # ``agent.agent`` stays available without building it at import time.
+    if name == "agent":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     "AgentSettings",
     "agent",
     "build_agent",
+    "get_agent",
+    "warmup_tools",
 ]
 
@@ -1,22 +1,70 @@
 """Low-level client for the Amedis online backend.
 
-This module contains a curl-backed HTTP layer that keeps TLS workarounds
-required to talk to https://online.amedis.by:4422.  The functions exposed
+This module contains the HTTP layer that keeps TLS workarounds required to
+talk to https://online.amedis.by:4422.  Requests go through a pooled
+``requests.Session`` with a legacy TLS context; the original curl transport
+is kept as a fallback (``AMEDIS_HTTP_TRANSPORT=curl``).  The functions exposed
 here are thin wrappers around the original reference implementation and are
 kept deliberately straightforward so they can be reused by tools or tests.
 """
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+import hashlib
+import inspect
 import json
 import os
 import re
+import ssl
 import subprocess
-from dataclasses import dataclass
+import threading
+import time
+import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Union
 import sys
-from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.parse import parse_qs, quote_plus, unquote_plus, urlencode
+
+try:
+    import requests  # type: ignore
+    import urllib3  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    requests = None  # fall back to curl
+
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    httpx = None  # async helpers fall back to worker threads
+
+try:
+    import h2  # type: ignore  # noqa: F401
+
+    _HTTP2 = True
+except Exception:  # pragma: no cover - optional dependency
+    _HTTP2 = False
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # in-process locking only
+
+try:
+    import ijson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    ijson = None  # HAR files are loaded in one piece
+
+try:
+    import orjson  # type: ignore
+
+    _loads: Callable[[Any], Any] = orjson.loads
+except Exception:  # pragma: no cover - optional dependency
+    _loads = json.loads
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -45,23 +93,131 @@ ENDPOINTS = {
 }
 
 
+# Connection setup fails fast so endpoint probes move on quickly; reads keep
+# a longer budget.  A plain number means the same value for both (requests).
+CONNECT_TIMEOUT = float(os.getenv("AMEDIS_CONNECT_TIMEOUT", "5"))
+Timeout = Union[float, Tuple[float, float]]
+_DEFAULT_TIMEOUT: Tuple[float, float] = (CONNECT_TIMEOUT, 20.0)
+_SCHEDULE_TIMEOUT: Tuple[float, float] = (CONNECT_TIMEOUT, 45.0)
+
+
+def _split_timeout(timeout: Timeout) -> Tuple[float, float]:
+    if isinstance(timeout, tuple):
+        return timeout
+    return float(timeout), float(timeout)
+
+
+# "requests" (default) or "curl"; curl is also used when requests is missing.
+HTTP_TRANSPORT = os.getenv("AMEDIS_HTTP_TRANSPORT", "requests").strip().lower()
+
+
 # ---------------------------------------------------------------------------
-# Curl-based HTTP layer (TLS workaround)
+# Pooled HTTP layer (TLS workaround)
 # ---------------------------------------------------------------------------
 
 
-def _curl_cmd_base(timeout: int = 25) -> List[str]:
+def _legacy_ssl_context() -> ssl.SSLContext:
+    """SSL context mirroring curl's ``--insecure --tlsv1.0 --ciphers`` flags."""
+
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE  # ⚠️ certificate validation is skipped
+    try:
+        # Deprecated by Python, but still required by the backend.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            ctx.minimum_version = ssl.TLSVersion.TLSv1
+    except (ValueError, AttributeError):  # pragma: no cover - OpenSSL policy
+        pass
+    try:
+        ctx.set_ciphers("DEFAULT:@SECLEVEL=1")
+    except ssl.SSLError:  # pragma: no cover - non-OpenSSL builds
+        pass
+    return ctx
+
+
+_SESSION: Optional["requests.Session"] = None
+_SESSION_LOCK = threading.Lock()
+
+if requests is not None:
+
+    class _LegacyTLSAdapter(HTTPAdapter):
+        """HTTPAdapter that installs the legacy TLS context on its pools."""
+
+        def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+            kwargs["ssl_context"] = _legacy_ssl_context()
+            super().init_poolmanager(*args, **kwargs)
+
+        def proxy_manager_for(self, *args: Any, **kwargs: Any) -> Any:
+            kwargs["ssl_context"] = _legacy_ssl_context()
+            return super().proxy_manager_for(*args, **kwargs)
+
+
+def _session() -> "requests.Session":
+    """Return the shared keep-alive session, creating it on first use."""
+
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                # The backend certificate is not verifiable; do not warn per call.
+                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+                session = requests.Session()
+                session.verify = False
+                # urllib3 advertises br/zstd only when their decoders are installed.
+                session.headers.update(
+                    {
+                        "Accept": "application/json",
+                        "Accept-Encoding": urllib3.util.make_headers(accept_encoding=True)[
+                            "accept-encoding"
+                        ],
+                    }
+                )
+                adapter = _LegacyTLSAdapter(
+                    pool_connections=4,
+                    pool_maxsize=20,
+                    # Only connection failures are retried; POSTs are never resent.
+                    max_retries=urllib3.util.Retry(total=2, read=0, status=0),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _SESSION = session
+    return _SESSION
+
+
+def _use_curl() -> bool:
+    return requests is None or HTTP_TRANSPORT == "curl"
+
+
+def _to_shim(response: Any) -> "ResponseShim":
+    # Keep the raw body; it is decoded lazily and only if text is needed.
+    return ResponseShim(status_code=response.status_code, content=response.content)
+
+
+# ---------------------------------------------------------------------------
+# Curl-based HTTP layer (fallback transport)
+# ---------------------------------------------------------------------------
+
+
+def _curl_cmd_base(timeout: Timeout = 25) -> List[str]:
     """Build the base curl command with TLS flags required by the backend."""
 
+    connect_timeout, read_timeout = _split_timeout(timeout)
+    # curl has no read timeout; bound the whole transfer instead.
+    max_time = connect_timeout + read_timeout if isinstance(timeout, tuple) else read_timeout
+
     cmd = [
         "curl",
         "--silent",
         "--show-error",
         "--http1.1",
+        "--compressed",  # negotiate gzip/br; curl decodes transparently
         "--insecure",  # ⚠️ skip certificate validation (required by backend)
         "--tlsv1.0",  # allow legacy TLS version
+        "--connect-timeout",
+        f"{connect_timeout:g}",
         "--max-time",
-        str(timeout),
+        f"{max_time:g}",
     ]
     # On Windows curl uses Schannel and does not support OpenSSL cipher strings;
     # passing --ciphers causes: "schannel: Failed setting algorithm cipher list".
@@ -76,40 +232,81 @@ def _run_curl(cmd: List[str]) -> "ResponseShim":
     full_cmd = cmd[:]
     if "-i" not in full_cmd and "--include" not in full_cmd:
         full_cmd.insert(1, "-i")
-    # Read as bytes to avoid locale-dependent decoding issues on Windows,
-    # then decode explicitly as UTF-8 with replacement for invalid bytes.
-    out_bytes = subprocess.check_output(full_cmd)
-    out = out_bytes.decode("utf-8", errors="replace")
-    parts = out.split("\r\n\r\n")
-    if len(parts) < 2:
-        parts = out.split("\n\n")
-    if len(parts) >= 2:
-        raw_headers = "\r\n\r\n".join(parts[:-1])
-        body = parts[-1]
-    else:
-        raw_headers = ""
-        body = out
+    # Read as bytes to avoid locale-dependent decoding issues on Windows; the
+    # body stays bytes and is decoded lazily by ResponseShim.
+    out = subprocess.check_output(full_cmd)
+    status_code, body = _split_curl_output(out)
+    return ResponseShim(status_code=status_code or 200, content=body)
+
+
+def _split_curl_output(out: bytes) -> Tuple[int, bytes]:
+    """Strip ``curl -i`` header blocks and return ``(last status, body)``.
+
+    Several blocks appear for ``100 Continue`` or proxy responses; each is
+    consumed in one pass so a blank line inside the body is never mistaken
+    for a header separator.
+    """
 
     status_code = 0
-    for line in raw_headers.splitlines():
-        line = line.strip()
-        if line.startswith("HTTP/"):
-            try:
-                status_code = int(line.split()[1])
-            except Exception:
-                pass
-    return ResponseShim(status_code=status_code or 200, text=body)
+    start = 0
+    while out.startswith(b"HTTP/", start):
+        line_end = out.find(b"\n", start)
+        status_line = out[start : line_end if line_end != -1 else len(out)]
+        try:
+            status_code = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            pass
+        crlf = out.find(b"\r\n\r\n", start)
+        lf = out.find(b"\n\n", start)
+        if crlf != -1 and (lf == -1 or crlf < lf):
+            start = crlf + 4
+        elif lf != -1:
+            start = lf + 2
+        else:
+            return status_code, b""
+    return status_code, out[start:]
 
 
-@dataclass
 class ResponseShim:
-    """Minimal response object compatible with the original implementation."""
+    """Minimal response object compatible with the original implementation.
+
+    Either the decoded ``text`` or the raw ``content`` bytes may be given; the
+    other representation is derived on first access.
+    """
 
-    status_code: int
-    text: str
+    __slots__ = ("status_code", "_text", "_content")
+
+    def __init__(
+        self,
+        status_code: int,
+        text: Optional[str] = None,
+        content: Optional[bytes] = None,
+    ) -> None:
+        self.status_code = status_code
+        self._text = text
+        self._content = content
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            # Decode explicitly as UTF-8, matching the curl transport.
+            self._text = (self._content or b"").decode("utf-8", errors="replace")
+        return self._text
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = (self._text or "").encode("utf-8")
+        return self._content
 
     def json(self) -> Any:
-        return json.loads(self.text)
+        if _loads is json.loads:
+            # The stdlib parser gets the leniently decoded text.
+            return json.loads(self.text)
+        return _loads(self.content)
+
+    def __repr__(self) -> str:
+        return f"ResponseShim(status_code={self.status_code!r}, text={self.text!r})"
 
 
 # ---------------------------------------------------------------------------
@@ -138,26 +335,46 @@ def _ensure_token(token: Optional[str]) -> str:
 def _build_url(
     base_url: str, path: str, params: Optional[Dict[str, Any]] = None
 ) -> str:
-    url = base_url.rstrip("/") + (path if path.startswith("/") else "/" + path)
+    url = _join_url(base_url, path)
     if params:
+        token = params.get("token")
+        if len(params) == 1 and isinstance(token, str):
+            # Token-only queries (directions probes) skip urlencode; built
+            # per call so no raw token is retained in a cache.
+            return f"{url}?token={quote_plus(token)}"
         qs = urlencode(params, doseq=True)
         url = f"{url}?{qs}"
     return url
 
 
+@functools.lru_cache(maxsize=256)
+def _join_url(base_url: str, path: str) -> str:
+    return base_url.rstrip("/") + (path if path.startswith("/") else "/" + path)
+
+
 def _api_get(
-    base_url: str, path: str, params: Dict[str, Any], timeout: int = 20
+    base_url: str, path: str, params: Dict[str, Any], timeout: Timeout = _DEFAULT_TIMEOUT
 ) -> ResponseShim:
     url = _build_url(base_url, path, params)
+    if not _use_curl():
+        return _to_shim(_session().get(url, timeout=timeout))
     cmd = _curl_cmd_base(timeout) + [url]
     return _run_curl(cmd)
 
 
 def _api_post_form(
-    base_url: str, path: str, data: Dict[str, Any], timeout: int = 20
+    base_url: str, path: str, data: Dict[str, Any], timeout: Timeout = _DEFAULT_TIMEOUT
 ) -> ResponseShim:
     url = _build_url(base_url, path, None)
     form = urlencode(data, doseq=True)
+    if not _use_curl():
+        response = _session().post(
+            url,
+            data=form,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=timeout,
+        )
+        return _to_shim(response)
     cmd = _curl_cmd_base(timeout) + [
         "-X",
         "POST",
@@ -170,21 +387,356 @@ def _api_post_form(
     return _run_curl(cmd)
 
 
+# Async variants use an httpx.AsyncClient (HTTP/2 when the optional ``h2``
+# package is installed) only inside an ``async_http_client()`` scope, which
+# owns the client for the lifetime of its event loop and closes it on exit
+# (chat_cli opens one around its whole dialogue loop). Loops without an owner,
+# e.g. one ``asyncio.run`` per call, run the sync helpers in a worker thread
+# on the pooled requests session, so keep-alive connections survive.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+@contextlib.asynccontextmanager
+async def async_http_client() -> AsyncIterator[None]:
+    """Own a shared async HTTP client for the running loop until exit.
+
+    Nested scopes reuse the outer client. Without httpx, or with the curl
+    transport selected, this is a no-op and async calls use worker threads.
+    """
+
+    loop = asyncio.get_running_loop()
+    if not _use_async_http() or loop in _ASYNC_CLIENTS:
+        yield
+        return
+    client = httpx.AsyncClient(
+        http2=_HTTP2,
+        verify=_legacy_ssl_context(),
+        headers={"Accept": "application/json"},
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    _ASYNC_CLIENTS[loop] = client
+    try:
+        yield
+    finally:
+        _ASYNC_CLIENTS.pop(loop, None)
+        await client.aclose()
+
+
+def _async_client() -> Optional["httpx.AsyncClient"]:
+    """Return the client owned by the running loop, if any."""
+
+    return _ASYNC_CLIENTS.get(asyncio.get_running_loop())
+
+
+def async_client_active() -> bool:
+    """Return True when the running loop owns an ``async_http_client()`` scope."""
+
+    return _async_client() is not None
+
+
+def _use_async_http() -> bool:
+    return httpx is not None and HTTP_TRANSPORT != "curl"
+
+
+async def _api_get_async(
+    base_url: str, path: str, params: Dict[str, Any], timeout: Timeout = _DEFAULT_TIMEOUT
+) -> ResponseShim:
+    client = _async_client() if _use_async_http() else None
+    if client is None:
+        return await asyncio.to_thread(_api_get, base_url, path, params, timeout)
+    url = _build_url(base_url, path, params)
+    return _to_shim(await client.get(url, timeout=_httpx_timeout(timeout)))
+
+
+async def _api_post_form_async(
+    base_url: str, path: str, data: Dict[str, Any], timeout: Timeout = _DEFAULT_TIMEOUT
+) -> ResponseShim:
+    client = _async_client() if _use_async_http() else None
+    if client is None:
+        return await asyncio.to_thread(_api_post_form, base_url, path, data, timeout)
+    response = await client.post(
+        _build_url(base_url, path, None),
+        content=urlencode(data, doseq=True),
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=_httpx_timeout(timeout),
+    )
+    return _to_shim(response)
+
+
+def _httpx_timeout(timeout: Timeout) -> "httpx.Timeout":
+    connect_timeout, read_timeout = _split_timeout(timeout)
+    return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+
+# Backend ids arrive as strings or ints; they are always sent as strings.
+Id = Union[str, int]
+
+
+def _as_id(value: Id) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+def _first(item: Dict[str, Any], keys: Tuple[str, ...], default: Any = None) -> Any:
+    """Return the first truthy ``item[key]`` in ``keys`` order, else ``default``."""
+
+    for key in keys:
+        value = item.get(key)
+        if value:
+            return value
+    return default
+
+
 def _safe_json(resp: ResponseShim) -> Any:
     try:
         return resp.json()
     except Exception:
+        if _loads is json.loads:
+            # The stdlib parser already failed; a second attempt cannot succeed.
+            return {"raw": resp.text}
         try:
+            # orjson is stricter (NaN, invalid UTF-8); retry leniently.
             return json.loads(resp.text)
         except Exception:
             return {"raw": resp.text}
 
 
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+# Directions, doctors and services change on human-edit timescales.
+CACHE_TTL_SECONDS = float(os.getenv("AMEDIS_CACHE_TTL", "600"))
+# The working directions endpoint practically never changes.
+ENDPOINT_TTL_SECONDS = 6 * 3600.0
+# Keys include the token hash and direction id, so bound the store.
+CACHE_MAX_ENTRIES = 256
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Thread-safe ``key -> value`` store with per-entry expiry.
+
+    Holds at most ``max_entries`` items: when full, expired entries are swept
+    first, then the oldest writes are evicted.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        self._data: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+
+    def get(self, key: Tuple[Any, ...]) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            return entry[1]
+
+    def set(self, key: Tuple[Any, ...], value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            data = self._data
+            # Re-insert so dict order stays oldest-write first.
+            data.pop(key, None)
+            if len(data) >= self._max_entries:
+                for stale in [k for k, (expires_at, _) in data.items() if expires_at <= now]:
+                    del data[stale]
+                while len(data) >= self._max_entries:
+                    del data[next(iter(data))]
+            data[key] = (now + ttl, value)
+
+    def discard(self, key: Tuple[Any, ...]) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, prefix: Optional[str] = None) -> None:
+        with self._lock:
+            if prefix is None:
+                self._data.clear()
+            else:
+                for key in [k for k in self._data if k[0] == prefix]:
+                    del self._data[key]
+
+
+_CACHE = _TTLCache()
+
+
+def _token_key(token: str) -> str:
+    # Cache keys never hold the raw token.
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _ttl_cached(
+    ttl_seconds: Optional[float] = None,
+    *,
+    name: Optional[str] = None,
+    cache_if: Callable[[Any], bool] = bool,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Memoize a ``(base_url, token, ...)`` lookup for ``ttl_seconds``.
+
+    Only results accepted by ``cache_if`` (non-empty by default) are stored, so
+    failures and empty answers are retried on the next call.  Cached values are
+    shared between callers and must not be mutated.  Coroutine functions are
+    supported; passing the sync function's ``name`` lets both variants share
+    entries.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(func)
+        cache_name = name or func.__name__
+
+        def cache_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+            if (CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds) <= 0:
+                return None
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments["token"] = _token_key(_ensure_token(arguments.get("token")))
+            return (cache_name, *arguments.values())
+
+        def store(key: Tuple[Any, ...], value: Any) -> None:
+            if cache_if(value):
+                _CACHE.set(key, value, CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                key = cache_key(args, kwargs)
+                if key is None:
+                    return await func(*args, **kwargs)
+                value = _CACHE.get(key)
+                if value is _MISSING:
+                    value = await func(*args, **kwargs)
+                    store(key, value)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = cache_key(args, kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+            value = _CACHE.get(key)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                store(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_cache(name: Optional[str] = None) -> None:
+    """Drop cached responses, either all of them or those of one function."""
+
+    _CACHE.invalidate(name)
+
+
+# The working directions endpoint is also persisted across restarts.
+PERSISTED_ENDPOINT_TTL_SECONDS = 7 * 24 * 3600.0
+_ENDPOINT_FILE_LOCK = threading.Lock()
+
+
+def endpoint_cache_path() -> Path:
+    """Return the file that persists discovered endpoints per base URL."""
+
+    override = os.getenv("AMEDIS_CACHE_DIR")
+    if override:
+        return Path(override).expanduser() / "endpoints.json"
+    cache_home = os.getenv("XDG_CACHE_HOME")
+    base_dir = Path(cache_home).expanduser() if cache_home else Path.home() / ".cache"
+    return base_dir / "amagent" / "endpoints.json"
+
+
+def _read_endpoint_file(path: Path) -> Dict[str, Any]:
+    try:
+        data = _loads(path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _update_endpoint_file(base_url: str, entry: Optional[Dict[str, Any]]) -> None:
+    """Set (or with ``entry=None`` remove) one base URL's entry on disk."""
+
+    path = endpoint_cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _ENDPOINT_FILE_LOCK, open(path.with_suffix(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            data = _read_endpoint_file(path)
+            if entry is None:
+                if data.pop(base_url, None) is None:
+                    return
+            else:
+                data[base_url] = entry
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)
+    except OSError:
+        pass  # the cache is an optimization only
+
+
+def _known_directions_endpoint(base_url: str) -> Optional[str]:
+    key = ("directions_endpoint", base_url)
+    endpoint = _CACHE.get(key)
+    if endpoint is not _MISSING:
+        return endpoint
+    entry = _read_endpoint_file(endpoint_cache_path()).get(base_url)
+    if not isinstance(entry, dict):
+        return None
+    endpoint = entry.get("directions")
+    expires_at = entry.get("expires_at")
+    if not isinstance(endpoint, str) or not isinstance(expires_at, (int, float)):
+        return None
+    remaining = expires_at - time.time()
+    if remaining <= 0:
+        return None
+    _CACHE.set(key, endpoint, min(remaining, ENDPOINT_TTL_SECONDS))
+    return endpoint
+
+
+def _remember_directions_endpoint(base_url: str, endpoint: str) -> None:
+    _CACHE.set(("directions_endpoint", base_url), endpoint, ENDPOINT_TTL_SECONDS)
+    _update_endpoint_file(
+        base_url,
+        {"directions": endpoint, "expires_at": time.time() + PERSISTED_ENDPOINT_TTL_SECONDS},
+    )
+
+
+def _forget_directions_endpoint(base_url: str) -> None:
+    _CACHE.discard(("directions_endpoint", base_url))
+    _update_endpoint_file(base_url, None)
+
+
+def warmup(base_url: str = BASE_URL_DEFAULT) -> None:
+    """Create the shared session and load the persisted directions endpoint.
+
+    Meant to run once at startup so the first request does not pay for it;
+    no network traffic is made.
+    """
+
+    if not _use_curl():
+        _session()
+    _known_directions_endpoint(base_url)
+
+
 # ---------------------------------------------------------------------------
 # Directions
 # ---------------------------------------------------------------------------
 
 
+@_ttl_cached(cache_if=lambda result: bool(result[1]))
 def discover_directions(base_url: str, token: str) -> Tuple[str, List[Dict[str, Any]], str]:
     """Try multiple endpoints to fetch directions list.
 
@@ -192,40 +744,59 @@ def discover_directions(base_url: str, token: str) -> Tuple[str, List[Dict[str,
     """
 
     token = _ensure_token(token)
-    for endpoint in ENDPOINTS["directions_candidates"]:
+    candidates = ENDPOINTS["directions_candidates"]
+
+    def probe(endpoint: str) -> List[Dict[str, Any]]:
+        response = _api_get(base_url, endpoint, params={"token": token})
+        if response.status_code != 200:
+            return []
+        return _normalize_directions(_safe_json(response))
+
+    known = _known_directions_endpoint(base_url)
+    if known:
         try:
-            response = _api_get(base_url, endpoint, params={"token": token})
-            if response.status_code == 200:
-                data = _safe_json(response)
-                rows = _normalize_directions(data)
-                if rows:
-                    return endpoint, rows, f"OK via {endpoint}"
+            rows = probe(known)
         except Exception:
-            continue
+            rows = []
+        if rows:
+            return known, rows, f"OK via {known}"
+        _forget_directions_endpoint(base_url)
+
+    # All candidates are probed concurrently, but the first one (in priority
+    # order) that returns directions wins, as with sequential probing.
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    try:
+        futures = [executor.submit(probe, endpoint) for endpoint in candidates]
+        for endpoint, future in zip(candidates, futures):
+            try:
+                rows = future.result()
+            except Exception:
+                continue
+            if rows:
+                _remember_directions_endpoint(base_url, endpoint)
+                return endpoint, rows, f"OK via {endpoint}"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
     return "", [], (
         "Не атрымалася аўтаматычна атрымаць спіс напрамкаў. "
         "Увядзіце ID напрамку ўручную."
     )
 
 
+_DIRECTION_ID_KEYS = ("id", "idDirection", "Id", "ID")
+_DIRECTION_NAME_KEYS = ("name", "title", "Name", "Title", "direction")
+
+
 def _normalize_directions(data: Any) -> List[Dict[str, Any]]:
     if isinstance(data, list):
         rows: List[Dict[str, Any]] = []
         for item in data:
             if isinstance(item, dict):
-                direction = {
-                    "id": item.get("id")
-                    or item.get("idDirection")
-                    or item.get("Id")
-                    or item.get("ID"),
-                    "name": item.get("name")
-                    or item.get("title")
-                    or item.get("Name")
-                    or item.get("Title")
-                    or item.get("direction"),
-                }
-                if direction["id"] is not None:
-                    rows.append(direction)
+                direction_id = _first(item, _DIRECTION_ID_KEYS)
+                if direction_id is not None:
+                    rows.append(
+                        {"id": _as_id(direction_id), "name": _first(item, _DIRECTION_NAME_KEYS)}
+                    )
         return rows
     if isinstance(data, dict):
         for key in ["directions", "items", "data", "result"]:
@@ -240,14 +811,32 @@ def _normalize_directions(data: Any) -> List[Dict[str, Any]]:
 # ---------------------------------------------------------------------------
 
 
+@_ttl_cached()
 def get_doctors(
     base_url: str, token: str, id_direction: Optional[str]
 ) -> List[Dict[str, Any]]:
-    token = _ensure_token(token)
-    params: Dict[str, Any] = {"token": token}
+    response = _api_get(base_url, ENDPOINTS["doctors"], params=_doctors_params(token, id_direction))
+    return _doctors_from_response(response)
+
+
+@_ttl_cached(name="get_doctors")
+async def get_doctors_async(
+    base_url: str, token: str, id_direction: Optional[str]
+) -> List[Dict[str, Any]]:
+    response = await _api_get_async(
+        base_url, ENDPOINTS["doctors"], params=_doctors_params(token, id_direction)
+    )
+    return _doctors_from_response(response)
+
+
+def _doctors_params(token: Optional[str], id_direction: Optional[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"token": _ensure_token(token)}
     if id_direction:
         params["idDirection"] = id_direction
-    response = _api_get(base_url, ENDPOINTS["doctors"], params=params)
+    return params
+
+
+def _doctors_from_response(response: ResponseShim) -> List[Dict[str, Any]]:
     if response.status_code != 200:
         raise RuntimeError(
             f"Doctors error {response.status_code}: {response.text[:400]}"
@@ -256,8 +845,11 @@ def get_doctors(
     return _normalize_doctors(data)
 
 
+_DOCTOR_ID_KEYS = ("id", "Id", "doctorId", "ID")
+_DOCTOR_NAME_KEYS = ("name", "fio", "FIO", "fullName")
+
+
 def _normalize_doctors(data: Any) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
     if isinstance(data, list):
         iterable: Iterable[Any] = data
     elif isinstance(data, dict):
@@ -271,31 +863,20 @@ def _normalize_doctors(data: Any) -> List[Dict[str, Any]]:
     else:
         iterable = []
 
+    # Single pass; insertion order keeps the first occurrence of each id.
+    unique: Dict[Any, Dict[str, Any]] = {}
     for item in iterable:
         if isinstance(item, dict):
-            out.append(
-                {
-                    "id": item.get("id")
-                    or item.get("Id")
-                    or item.get("doctorId")
-                    or item.get("ID"),
-                    "name": item.get("name")
-                    or item.get("fio")
-                    or item.get("FIO")
-                    or item.get("fullName")
-                    or "",
+            doc_id = _first(item, _DOCTOR_ID_KEYS)
+            if doc_id:
+                doc_id = _as_id(doc_id)
+            if doc_id and doc_id not in unique:
+                unique[doc_id] = {
+                    "id": doc_id,
+                    "name": _first(item, _DOCTOR_NAME_KEYS, ""),
                     "raw": item,
                 }
-            )
-
-    seen = set()
-    unique: List[Dict[str, Any]] = []
-    for doctor in out:
-        doc_id = doctor.get("id")
-        if doc_id and doc_id not in seen:
-            unique.append(doctor)
-            seen.add(doc_id)
-    return unique
+    return list(unique.values())
 
 
 # ---------------------------------------------------------------------------
@@ -303,6 +884,7 @@ def _normalize_doctors(data: Any) -> List[Dict[str, Any]]:
 # ---------------------------------------------------------------------------
 
 
+@_ttl_cached()
 def get_service_duration(
     base_url: str, token: str, id_direction: Optional[str]
 ) -> List[Dict[str, Any]]:
@@ -314,12 +896,36 @@ def get_service_duration(
         ENDPOINTS["service_duration"],
         params={"token": token, "idDirection": id_direction},
     )
+    return _services_from_response(response)
+
+
+@_ttl_cached(name="get_service_duration")
+async def get_service_duration_async(
+    base_url: str, token: str, id_direction: Optional[str]
+) -> List[Dict[str, Any]]:
+    token = _ensure_token(token)
+    if not id_direction:
+        return []
+    response = await _api_get_async(
+        base_url,
+        ENDPOINTS["service_duration"],
+        params={"token": token, "idDirection": id_direction},
+    )
+    return _services_from_response(response)
+
+
+def _services_from_response(response: ResponseShim) -> List[Dict[str, Any]]:
     if response.status_code != 200:
         return []
     data = _safe_json(response)
     return _normalize_services(data)
 
 
+_SERVICE_ID_KEYS = ("id", "serviceId", "Id")
+_SERVICE_NAME_KEYS = ("name", "serviceName", "Name", "researchText")
+_SERVICE_DURATION_KEYS = ("duration", "Duration", "timePriemMinutes")
+
+
 def _normalize_services(data: Any) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
     iterable: Iterable[Any] = []
@@ -332,19 +938,12 @@ def _normalize_services(data: Any) -> List[Dict[str, Any]]:
                 break
     for item in iterable:
         if isinstance(item, dict):
+            service_id = _first(item, _SERVICE_ID_KEYS)
             out.append(
                 {
-                    "id": item.get("id")
-                    or item.get("serviceId")
-                    or item.get("Id"),
-                    "name": item.get("name")
-                    or item.get("serviceName")
-                    or item.get("Name")
-                    or item.get("researchText")
-                    or "",
-                    "duration": item.get("duration")
-                    or item.get("Duration")
-                    or item.get("timePriemMinutes"),
+                    "id": None if service_id is None else _as_id(service_id),
+                    "name": _first(item, _SERVICE_NAME_KEYS, ""),
+                    "duration": _first(item, _SERVICE_DURATION_KEYS),
                     "raw": item,
                 }
             )
@@ -359,21 +958,50 @@ def _normalize_services(data: Any) -> List[Dict[str, Any]]:
 def get_schedule(
     base_url: str,
     token: str,
-    doctor_id: str,
+    doctor_id: Id,
     start_date: str,
     end_date: str,
-    service_id: Optional[str],
+    service_id: Optional[Id],
 ) -> List[Dict[str, Any]]:
-    token = _ensure_token(token)
+    params = _schedule_params(token, doctor_id, start_date, end_date, service_id)
+    response = _api_get(base_url, ENDPOINTS["schedule"], params=params, timeout=_SCHEDULE_TIMEOUT)
+    return _slots_from_response(response)
+
+
+async def get_schedule_async(
+    base_url: str,
+    token: str,
+    doctor_id: Id,
+    start_date: str,
+    end_date: str,
+    service_id: Optional[Id],
+) -> List[Dict[str, Any]]:
+    params = _schedule_params(token, doctor_id, start_date, end_date, service_id)
+    response = await _api_get_async(
+        base_url, ENDPOINTS["schedule"], params=params, timeout=_SCHEDULE_TIMEOUT
+    )
+    return _slots_from_response(response)
+
+
+def _schedule_params(
+    token: Optional[str],
+    doctor_id: Id,
+    start_date: str,
+    end_date: str,
+    service_id: Optional[Id],
+) -> Dict[str, Any]:
     params: Dict[str, Any] = {
-        "token": token,
-        "doctorIds": str(doctor_id),
+        "token": _ensure_token(token),
+        "doctorIds": _as_id(doctor_id),
         "startDate": start_date,
         "endDate": end_date,
     }
     if service_id:
-        params["serviceId"] = str(service_id)
-    response = _api_get(base_url, ENDPOINTS["schedule"], params=params)
+        params["serviceId"] = _as_id(service_id)
+    return params
+
+
+def _slots_from_response(response: ResponseShim) -> List[Dict[str, Any]]:
     if response.status_code != 200:
         raise RuntimeError(
             f"Schedule error {response.status_code}: {response.text[:400]}"
@@ -383,76 +1011,76 @@ def get_schedule(
 
 
 def _normalize_slots(data: Any) -> List[Dict[str, Any]]:
-    slots: List[Dict[str, Any]] = []
+    # Dispatch once on the payload shape; a list falls back to flat slot rows
+    # only when it is not the nested ``[{key: [{date: [slot, ...]}]}]`` form.
+    if isinstance(data, list):
+        return list(_iter_nested_slots(data)) or list(_iter_flat_slots(data))
+    if isinstance(data, dict):
+        return list(_iter_day_time_slots(data))
+    return []
 
-    def add_slot(start: str, end: Optional[str] = None, raw: Any = None) -> None:
-        slots.append({"startAt": start, "endAt": end, "raw": raw})
 
-    if isinstance(data, list):
-        for item in data:
-            if not isinstance(item, dict):
+def _is_clock(value: Any) -> bool:
+    """Whether ``value`` is a bare ``HH:MM`` time that needs a date prefix."""
+
+    return isinstance(value, str) and len(value) <= 5 and ":" in value
+
+
+def _slot(start: Any, end: Any, raw: Any) -> Dict[str, Any]:
+    return {"startAt": start, "endAt": end, "raw": raw}
+
+
+def _iter_nested_slots(data: List[Any]) -> Iterable[Dict[str, Any]]:
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        for dates in item.values():
+            if not isinstance(dates, list):
                 continue
-            for _, dates in item.items():
-                if not isinstance(dates, list):
+            for block in dates:
+                if not isinstance(block, dict):
                     continue
-                for block in dates:
-                    if not isinstance(block, dict):
+                meta = {k: v for k, v in block.items() if not isinstance(v, list)}
+                for date_str, day_slots in block.items():
+                    if not isinstance(day_slots, list):
                         continue
-                    meta = {k: v for k, v in block.items() if not isinstance(v, list)}
-                    for date_str, day_slots in block.items():
-                        if not isinstance(day_slots, list):
+                    date_prefix = f"{date_str} "
+                    for slot in day_slots:
+                        if not isinstance(slot, dict):
+                            continue
+                        start = slot.get("startAt") or slot.get("start") or slot.get("time")
+                        if not start:
                             continue
-                        for slot in day_slots:
-                            if not isinstance(slot, dict):
-                                continue
-                            start = (
-                                slot.get("startAt")
-                                or slot.get("start")
-                                or slot.get("time")
-                            )
-                            end = slot.get("endAt") or slot.get("end")
-                            if not start:
-                                continue
-                            if isinstance(start, str) and len(start) <= 5 and ":" in start:
-                                start_full = f"{date_str} {start}"
-                            else:
-                                start_full = start
-                            if isinstance(end, str) and len(end) <= 5 and ":" in end:
-                                end_full = f"{date_str} {end}"
-                            else:
-                                end_full = end
-                            raw = {"date": date_str, **meta, **slot}
-                            add_slot(start_full, end_full, raw)
-        if slots:
-            return slots
+                        end = slot.get("endAt") or slot.get("end")
+                        yield _slot(
+                            date_prefix + start if _is_clock(start) else start,
+                            date_prefix + end if _is_clock(end) else end,
+                            {"date": date_str, **meta, **slot},
+                        )
 
-    if isinstance(data, dict):
-        for value in data.values():
-            if isinstance(value, list):
-                for day in value:
-                    if isinstance(day, dict):
-                        date = day.get("date") or day.get("Date")
-                        times = day.get("times") or day.get("Times") or []
-                        if isinstance(times, list) and date:
-                            for time_item in times:
-                                if isinstance(time_item, str):
-                                    add_slot(
-                                        f"{date} {time_item}",
-                                        None,
-                                        {"date": date, "time": time_item},
-                                    )
-        if slots:
-            return slots
 
-    if isinstance(data, list):
-        for item in data:
-            if isinstance(item, dict):
-                start = item.get("startAt") or item.get("start") or item.get("time")
-                end = item.get("endAt") or item.get("end")
-                if start:
-                    add_slot(start, end, item)
+def _iter_day_time_slots(data: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    for value in data.values():
+        if not isinstance(value, list):
+            continue
+        for day in value:
+            if not isinstance(day, dict):
+                continue
+            date = day.get("date") or day.get("Date")
+            times = day.get("times") or day.get("Times") or []
+            if not (isinstance(times, list) and date):
+                continue
+            for time_item in times:
+                if isinstance(time_item, str):
+                    yield _slot(f"{date} {time_item}", None, {"date": date, "time": time_item})
 
-    return slots
+
+def _iter_flat_slots(data: List[Any]) -> Iterable[Dict[str, Any]]:
+    for item in data:
+        if isinstance(item, dict):
+            start = item.get("startAt") or item.get("start") or item.get("time")
+            if start:
+                yield _slot(start, item.get("endAt") or item.get("end"), item)
 
 
 # ---------------------------------------------------------------------------
@@ -460,32 +1088,83 @@ def _normalize_slots(data: Any) -> List[Dict[str, Any]]:
 # ---------------------------------------------------------------------------
 
 
+_RECORD_FIELDS = (
+    "token",
+    "doctor",
+    "patient",
+    "startAt",
+    "endAt",
+    "description",
+    "Ins_name",
+)
+
+
 def create_record(
     base_url: str,
     token: str,
-    doctor_id: str,
-    patient_id: str,
+    doctor_id: Id,
+    patient_id: Id,
+    start_at: str,
+    end_at: Optional[str],
+    description: str,
+    insurer: str,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    data = _record_form(token, doctor_id, patient_id, start_at, end_at, description, insurer, extra)
+    response = _api_post_form(base_url, ENDPOINTS["record_create"], data=data)
+    return _record_result(response, data)
+
+
+async def create_record_async(
+    base_url: str,
+    token: str,
+    doctor_id: Id,
+    patient_id: Id,
     start_at: str,
     end_at: Optional[str],
     description: str,
     insurer: str,
     extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    data = _record_form(token, doctor_id, patient_id, start_at, end_at, description, insurer, extra)
+    response = await _api_post_form_async(base_url, ENDPOINTS["record_create"], data=data)
+    return _record_result(response, data)
+
+
+def _record_form(
+    token: Optional[str],
+    doctor_id: Id,
+    patient_id: Id,
+    start_at: str,
+    end_at: Optional[str],
+    description: str,
+    insurer: str,
+    extra: Optional[Dict[str, Any]],
 ) -> Dict[str, Any]:
     token = _ensure_token(token)
-    data: Dict[str, Any] = {
-        "token": token,
-        "doctor": str(doctor_id),
-        "patient": str(patient_id),
-        "startAt": start_at,
-        "endAt": end_at or "",
-        "description": description,
-        "Ins_name": insurer,
-    }
+    # Base fields are always sent, in a fixed order; empty extras are dropped.
+    data: Dict[str, Any] = dict(
+        zip(
+            _RECORD_FIELDS,
+            (
+                token,
+                _as_id(doctor_id),
+                _as_id(patient_id),
+                start_at,
+                end_at or "",
+                description,
+                insurer,
+            ),
+        )
+    )
     if extra:
-        for key, value in extra.items():
-            if value is not None and value != "":
-                data[key] = value
-    response = _api_post_form(base_url, ENDPOINTS["record_create"], data=data)
+        data.update(
+            {key: value for key, value in extra.items() if value is not None and value != ""}
+        )
+    return data
+
+
+def _record_result(response: ResponseShim, data: Dict[str, Any]) -> Dict[str, Any]:
     if response.status_code != 200:
         try:
             payload = response.json()
@@ -504,14 +1183,30 @@ def create_record(
 
 
 def list_patient_records(
-    base_url: str, token: str, patient_api_id: str
+    base_url: str, token: str, patient_api_id: Id
 ) -> List[Dict[str, Any]]:
     token = _ensure_token(token)
     response = _api_get(
         base_url,
         ENDPOINTS["patient_records"],
-        params={"token": token, "patientAPIId": str(patient_api_id)},
+        params={"token": token, "patientAPIId": _as_id(patient_api_id)},
     )
+    return _records_from_response(response)
+
+
+async def list_patient_records_async(
+    base_url: str, token: str, patient_api_id: Id
+) -> List[Dict[str, Any]]:
+    token = _ensure_token(token)
+    response = await _api_get_async(
+        base_url,
+        ENDPOINTS["patient_records"],
+        params={"token": token, "patientAPIId": _as_id(patient_api_id)},
+    )
+    return _records_from_response(response)
+
+
+def _records_from_response(response: ResponseShim) -> List[Dict[str, Any]]:
     if response.status_code != 200:
         raise RuntimeError(
             f"Patient records error {response.status_code}: {response.text[:400]}"
@@ -520,15 +1215,20 @@ def list_patient_records(
     return _normalize_records(data)
 
 
+_RECORD_ID_KEYS = ("id", "recordId", "Id")
+_RECORD_DOCTOR_KEYS = ("doctorName", "doctor", "Doctor")
+_RECORD_START_KEYS = ("startAt", "date", "start")
+_RECORD_END_KEYS = ("endAt", "end")
+_RECORD_STATUS_KEYS = ("status", "Status", "status_pac")
+
+
 def _normalize_records(data: Any) -> List[Dict[str, Any]]:
     items: List[Dict[str, Any]] = []
     if isinstance(data, list):
-        if len(data) == 1 and isinstance(data[0], dict) and isinstance(
-            data[0].get("records"), list
-        ):
-            iterable = data[0]["records"]
-        else:
-            iterable = data
+        # ``[{"records": [...]}]`` wraps the actual rows in a single object.
+        head = data[0] if len(data) == 1 else None
+        nested = head.get("records") if isinstance(head, dict) else None
+        iterable = nested if isinstance(nested, list) else data
     elif isinstance(data, dict):
         iterable = (
             data.get("records")
@@ -539,24 +1239,18 @@ def _normalize_records(data: Any) -> List[Dict[str, Any]]:
         )
     else:
         iterable = []
+    first = _first
     for item in iterable:
         if not isinstance(item, dict):
             continue
+        record_id = first(item, _RECORD_ID_KEYS)
         items.append(
             {
-                "recordId": item.get("id")
-                or item.get("recordId")
-                or item.get("Id"),
-                "doctor": item.get("doctorName")
-                or item.get("doctor")
-                or item.get("Doctor"),
-                "startAt": item.get("startAt")
-                or item.get("date")
-                or item.get("start"),
-                "endAt": item.get("endAt") or item.get("end"),
-                "status": item.get("status")
-                or item.get("Status")
-                or item.get("status_pac"),
+                "recordId": None if record_id is None else _as_id(record_id),
+                "doctor": first(item, _RECORD_DOCTOR_KEYS),
+                "startAt": first(item, _RECORD_START_KEYS),
+                "endAt": first(item, _RECORD_END_KEYS),
+                "status": first(item, _RECORD_STATUS_KEYS),
                 "raw": item,
             }
         )
@@ -566,18 +1260,38 @@ def _normalize_records(data: Any) -> List[Dict[str, Any]]:
 def cancel_record(
     base_url: str,
     token: str,
-    record_id: str,
+    record_id: Id,
     cancel_status: str = "CAN",
 ) -> Dict[str, Any]:
-    token = _ensure_token(token)
-    data = {
-        "token": token,
-        "recordId": str(record_id),
-        "status": cancel_status,
-    }
+    data = _cancel_form(token, record_id, cancel_status)
     response = _api_post_form(
         base_url, ENDPOINTS["record_change_status"], data=data
     )
+    return _cancel_result(response, data)
+
+
+async def cancel_record_async(
+    base_url: str,
+    token: str,
+    record_id: Id,
+    cancel_status: str = "CAN",
+) -> Dict[str, Any]:
+    data = _cancel_form(token, record_id, cancel_status)
+    response = await _api_post_form_async(
+        base_url, ENDPOINTS["record_change_status"], data=data
+    )
+    return _cancel_result(response, data)
+
+
+def _cancel_form(token: Optional[str], record_id: Id, cancel_status: str) -> Dict[str, Any]:
+    return {
+        "token": _ensure_token(token),
+        "recordId": _as_id(record_id),
+        "status": cancel_status,
+    }
+
+
+def _cancel_result(response: ResponseShim, data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "status_code": response.status_code,
         "data": _safe_json(response),
@@ -591,48 +1305,38 @@ def cancel_record(
 
 
 def parse_har_for_patient(har_path: str) -> Dict[str, Any]:
-    """Extract patient identifiers and record fields from a HAR dump."""
+    """Extract patient identifiers and record fields from a HAR dump.
+
+    Results are cached per ``(path, mtime, size)``, so re-reading an
+    unchanged capture across agent turns does not parse it again.
+    """
+
+    path = Path(har_path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return {"patient_ids": [], "ins_name": None, "record_fields": []}
+    return _parse_har_cached(str(path), stat.st_mtime_ns, stat.st_size)
 
+
+@functools.lru_cache(maxsize=8)
+def _parse_har_cached(har_path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    # ``mtime_ns``/``size`` only key the cache; a rewritten file misses it.
     result: Dict[str, Any] = {
         "patient_ids": [],
         "ins_name": None,
         "record_fields": [],
     }
     path = Path(har_path)
-    if not path.exists():
-        return result
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return result
-
     patient_ids = set()
     ins_name: Optional[str] = None
     fields_seen: Optional[List[str]] = None
 
-    for entry in data.get("log", {}).get("entries", []):
-        request = entry.get("request", {}) or {}
-        url = request.get("url", "") or ""
-        method = request.get("method", "")
-        query = urlparse(url).query
-        params = parse_qs(query)
-        if "patientAPIId" in params:
-            for value in params["patientAPIId"]:
-                if value:
-                    patient_ids.add(value)
-        body = (request.get("postData", {}) or {}).get("text", "") or ""
-        match = re.search(r"patientAPIId=([0-9]+)", body)
-        if match:
-            patient_ids.add(match.group(1))
-        if url.endswith("/record/create") and method == "POST":
-            form = parse_qs(body)
-            flattened = {
-                key: (value[0] if isinstance(value, list) and value else "")
-                for key, value in form.items()
-            }
-            fields_seen = list(flattened.keys())
-            if flattened.get("Ins_name"):
-                ins_name = flattened.get("Ins_name")
+    try:
+        for entry in _iter_har_entries(path):
+            ins_name, fields_seen = _scan_har_entry(entry, patient_ids, ins_name, fields_seen)
+    except Exception:
+        return result
 
     result["patient_ids"] = sorted(patient_ids)
     result["ins_name"] = ins_name
@@ -640,6 +1344,55 @@ def parse_har_for_patient(har_path: str) -> Dict[str, Any]:
     return result
 
 
+def _iter_har_entries(path: Path) -> Iterable[Dict[str, Any]]:
+    """Yield ``log.entries`` items, streaming the file when ijson is available."""
+
+    with path.open("rb") as handle:
+        if ijson is not None:
+            # Browser captures can be hundreds of MB; keep one entry in memory.
+            yield from ijson.items(handle, "log.entries.item")
+            return
+        data = _loads(handle.read())
+    yield from data.get("log", {}).get("entries", [])
+
+
+_PATIENT_RE = re.compile(r"patientAPIId=([0-9]+)")
+_QUERY_PATIENT_RE = re.compile(r"(?:^|&)patientAPIId=([^&]*)")
+
+
+def _scan_har_entry(
+    entry: Dict[str, Any],
+    patient_ids: set,
+    ins_name: Optional[str],
+    fields_seen: Optional[List[str]],
+) -> Tuple[Optional[str], Optional[List[str]]]:
+    request = entry.get("request", {}) or {}
+    url = request.get("url", "") or ""
+    method = request.get("method", "")
+    # Most entries carry no patient id: a substring test skips URL parsing.
+    if "patientAPIId=" in url:
+        query = url.partition("#")[0].partition("?")[2]
+        for value in _QUERY_PATIENT_RE.findall(query):
+            value = unquote_plus(value)
+            if value:
+                patient_ids.add(value)
+    body = (request.get("postData", {}) or {}).get("text", "") or ""
+    if "patientAPIId=" in body:
+        match = _PATIENT_RE.search(body)
+        if match:
+            patient_ids.add(match.group(1))
+    if url.endswith("/record/create") and method == "POST":
+        form = parse_qs(body)
+        flattened = {
+            key: (value[0] if isinstance(value, list) and value else "")
+            for key, value in form.items()
+        }
+        fields_seen = list(flattened.keys())
+        if flattened.get("Ins_name"):
+            ins_name = flattened.get("Ins_name")
+    return ins_name, fields_seen
+
+
 __all__ = [
     "BASE_URL_DEFAULT",
     "AMEDIS_GUEST_TOKEN",
@@ -651,6 +1404,16 @@ __all__ = [
     "create_record",
     "list_patient_records",
     "cancel_record",
+    "get_doctors_async",
+    "get_service_duration_async",
+    "get_schedule_async",
+    "create_record_async",
+    "list_patient_records_async",
+    "cancel_record_async",
+    "async_http_client",
+    "async_client_active",
+    "invalidate_cache",
+    "warmup",
     "parse_har_for_patient",
     "read_token_from_file",
 ]
@@ -7,10 +7,15 @@
 #      from this_file import launch_gradio; launch_gradio().launch()
 
 from __future__ import annotations
+import functools
+import hashlib
+import io
 import json
 import os
 import sys
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -20,6 +25,24 @@ try:
 except Exception:
     gr = None  # UI не даступны
 
+# libcurl праз pycurl: адно злучэнне і TLS-сесія на ўсе запыты
+try:
+    import pycurl  # type: ignore
+except Exception:
+    pycurl = None  # fallback: асобны працэс curl на кожны запыт
+
+# orjson хутчэй за stdlib json на вялікіх адказах (расклад, запісы)
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
+# Струменевы разбор HAR (дзясяткі МБ) без загрузкі ўсяго дакумента ў памяць
+try:
+    import ijson  # type: ignore
+except Exception:
+    ijson = None
+
 # -----------------------
 # Configuration defaults
 # -----------------------
@@ -36,122 +59,205 @@ ENDPOINTS = {
     "record_change_status": "/record/change-status",
     "patient_records": "/patient/recordsbyid",
 }
+# Slot fields forwarded to /record/create when the schedule provides them;
+# a tuple so the POST field order is the same in every process
+SLOT_EXTRA_KEYS = ("officeId", "cabinetId", "serviceId", "directionId", "office", "cabinet")
 
 # -----------------------
 # Curl-based HTTP layer
 # -----------------------
 
+# Тыя ж самыя флажкі, што дапамаглі раней:
+# --http1.1, --insecure, --tlsv1.0, --ciphers DEFAULT:@SECLEVEL=1
+# Замест -i curl сам дапісвае код адказу пасля цела: загалоўкі не патрэбны.
+_CURL_BASE = (
+    "curl",
+    "--silent", "--show-error",
+    "--http1.1",
+    "--insecure",                # ⚠️ без праверкі сертыфікатаў
+    "--tlsv1.0",                 # дазвол старога TLS
+    "--ciphers", "DEFAULT:@SECLEVEL=1",
+    "--write-out", "\n%{http_code}",
+)
+
 def _curl_cmd_base(timeout: int = 25) -> List[str]:
-    # Тыя ж самыя флажкі, што дапамаглі раней:
-    # --http1.1, --insecure, --tlsv1.0, --ciphers DEFAULT:@SECLEVEL=1
-    return [
-        "curl",
-        "--silent", "--show-error",
-        "--http1.1",
-        "--insecure",                # ⚠️ без праверкі сертыфікатаў
-        "--tlsv1.0",                 # дазвол старога TLS
-        "--max-time", str(timeout),
-        "--ciphers", "DEFAULT:@SECLEVEL=1",
-    ]
+    return [*_CURL_BASE, "--max-time", str(timeout)]
 
-def _run_curl(cmd: List[str]) -> "ResponseShim":
+def _run_curl(full_cmd: List[str], stdin: Optional[bytes] = None) -> "ResponseShim":
     # Выканаць curl і вярнуць шым з палямі status_code/text/json()
-    # Дадаем -i каб атрымаць статус + загалоўкі і выдзеліць код адказу.
-    full_cmd = cmd[:]
-    if "-i" not in full_cmd and "--include" not in full_cmd:
-        full_cmd.insert(1, "-i")
     # print("CMD:", " ".join(full_cmd))
-    out = subprocess.check_output(full_cmd, text=True)
-    # Раздзяляем headers/body
-    # curl -i можа вярнуць некалькі блокаў загалоўкаў (redirect), бяром апошні блок
-    parts = out.split("\r\n\r\n")
-    if len(parts) < 2:
-        parts = out.split("\n\n")
-    if len(parts) >= 2:
-        raw_headers = "\r\n\r\n".join(parts[:-1])
-        body = parts[-1]
-    else:
-        raw_headers = ""
-        body = out
-    # Вызначым апошні статус-код
-    status_code = 0
-    for line in raw_headers.splitlines():
-        line = line.strip()
-        if line.startswith("HTTP/"):
-            try:
-                status_code = int(line.split()[1])
-            except Exception:
-                pass
-    return ResponseShim(status_code=status_code or 200, text=body)
+    # Без text=True: цела застаецца bytes і ідзе ў json() без дэкадавання
+    out = subprocess.check_output(full_cmd, input=stdin)
+    # Апошні радок — код адказу з --write-out (пры redirect — апошні)
+    body, _, code = out.rpartition(b"\n")
+    try:
+        status_code = int(code)
+    except ValueError:
+        status_code = 0
+    return ResponseShim(status_code=status_code or 200, content=body)
+
+# -----------------------
+# libcurl HTTP layer (optional)
+# -----------------------
+# Пул easy-handle'аў: кожны handle не thread-safe, таму адзін запыт займае
+# адзін handle, а пасля вяртае яго ў пул разам з keep-alive злучэннем.
+# list.append/pop атамарныя пад GIL, асобны lock не патрэбны.
+_IDLE_HANDLES: List[Any] = []
+
+def _new_curl_handle():
+    # TLS-налады тыя ж, што і ў _curl_cmd_base, задаюцца адзін раз на handle
+    c = pycurl.Curl()
+    c.setopt(pycurl.SSL_VERIFYPEER, 0)
+    c.setopt(pycurl.SSL_VERIFYHOST, 0)
+    c.setopt(pycurl.SSLVERSION, pycurl.SSLVERSION_TLSv1_0)
+    c.setopt(pycurl.SSL_CIPHER_LIST, "DEFAULT:@SECLEVEL=1")
+    c.setopt(pycurl.HTTP_VERSION, pycurl.CURL_HTTP_VERSION_1_1)
+    c.setopt(pycurl.NOSIGNAL, 1)
+    return c
+
+_FORM_HEADERS = [b"Content-Type: application/x-www-form-urlencoded"]
+
+def _perform(url: str, timeout: float, form: Optional[bytes] = None) -> "ResponseShim":
+    # Адзін запыт праз handle з пула; злучэнне выкарыстоўваецца паўторна
+    try:
+        c = _IDLE_HANDLES.pop()
+    except IndexError:
+        c = _new_curl_handle()
+    buf = io.BytesIO()
+    try:
+        c.setopt(pycurl.URL, url)
+        c.setopt(pycurl.TIMEOUT_MS, int(timeout * 1000))
+        c.setopt(pycurl.WRITEDATA, buf)
+        if form is None:
+            c.setopt(pycurl.HTTPGET, 1)
+            c.setopt(pycurl.HTTPHEADER, [])
+        else:
+            c.setopt(pycurl.POSTFIELDS, form)
+            c.setopt(pycurl.HTTPHEADER, _FORM_HEADERS)
+        c.perform()
+        status_code = c.getinfo(pycurl.RESPONSE_CODE)
+    finally:
+        _IDLE_HANDLES.append(c)
+    return ResponseShim(status_code=status_code or 200, content=buf.getvalue())
+
+_UNPARSED = object()
 
 class ResponseShim:
-    def __init__(self, status_code: int, text: str):
+    def __init__(self, status_code: int, text: Optional[str] = None, content: Optional[bytes] = None):
         self.status_code = status_code
-        self.text = text
+        self._text = text
+        self._json = _UNPARSED
+        self.content = content if content is not None else (text or "").encode("utf-8")
+
+    @property
+    def text(self) -> str:
+        # Дэкадуем цела толькі калі яно сапраўды патрэбна як радок
+        if self._text is None:
+            self._text = self.content.decode("utf-8", "replace")
+        return self._text
 
     def json(self) -> Any:
+        # Распарсаны адказ запамінаецца: паўторныя json() не парсяць цела зноў
+        if self._json is _UNPARSED:
+            self._json = self._parse()
+        return self._json
+
+    def _parse(self) -> Any:
+        if orjson is not None:
+            try:
+                return orjson.loads(self.content)
+            except orjson.JSONDecodeError:
+                pass
         return json.loads(self.text)
 
 # -------- HAR helpers (optional) --------
 import re
-from urllib.parse import urlparse, parse_qs, urlencode
+from urllib.parse import urlsplit, parse_qs, parse_qsl, quote_plus, urlencode
 from pathlib import Path
 
+# HAR можа мець тысячы запісаў: шаблон кампілюецца адзін раз
+_PATIENT_ID_RE = re.compile(r"patientAPIId=([0-9]+)")
+
+def _iter_har_entries(p: Path):
+    # З ijson чытаем log.entries па адным, інакш — звычайны json.loads
+    if ijson is not None:
+        with p.open("rb") as f:
+            yield from ijson.items(f, "log.entries.item")
+        return
+    har = json.loads(p.read_text(encoding="utf-8"))
+    yield from har.get("log", {}).get("entries", [])
+
 def parse_har_for_patient(har_path: str) -> Dict[str, Any]:
     """Выняць patientAPIId і прыкладныя палі для /record/create з HAR-файла."""
     out = {"patient_ids": [], "ins_name": None, "record_fields": []}
     p = Path(har_path)
     if not p.exists():
         return out
-    try:
-        har = json.loads(p.read_text(encoding="utf-8"))
-    except Exception:
-        return out
     patient_ids = set()
     ins_name = None
     fields_seen = None
-    for e in har.get("log", {}).get("entries", []):
-        req = e.get("request", {}) or {}
-        url = req.get("url", "") or ""
-        method = req.get("method", "")
-        q = urlparse(url).query
-        qs = parse_qs(q)
-        if "patientAPIId" in qs:
-            for v in qs["patientAPIId"]:
-                if v:
-                    patient_ids.add(v)
-        body = (req.get("postData", {}) or {}).get("text", "") or ""
-        m = re.search(r"patientAPIId=([0-9]+)", body)
-        if m:
-            patient_ids.add(m.group(1))
-        if url.endswith("/record/create") and method == "POST":
-            f = parse_qs(body)
-            flat = {k: (v[0] if isinstance(v, list) and v else "") for k, v in f.items()}
-            fields_seen = list(flat.keys())
-            if flat.get("Ins_name"):
-                ins_name = flat.get("Ins_name")
+    # Праходзім усе запісы: пазнейшыя id і Ins_name таксама трапляюць у
+    # спіс пацыентаў UI, а ijson і так не трымае ўвесь HAR у памяці
+    try:
+        for e in _iter_har_entries(p):
+            ins_name, fields_seen = _scan_har_entry(e, patient_ids, ins_name, fields_seen)
+    except Exception:
+        # Пашкоджаны HAR: як і раней, пусты вынік замест частковага
+        return out
     out["patient_ids"] = sorted(patient_ids)
     out["ins_name"] = ins_name
     out["record_fields"] = fields_seen or []
     return out
 
+def _scan_har_entry(e: Dict[str, Any], patient_ids: set, ins_name: Optional[str], fields_seen: Optional[List[str]]):
+    req = e.get("request", {}) or {}
+    url = req.get("url", "") or ""
+    method = req.get("method", "")
+    for k, v in parse_qsl(urlsplit(url).query):
+        if k == "patientAPIId" and v:
+            patient_ids.add(v)
+    body = (req.get("postData", {}) or {}).get("text", "") or ""
+    m = _PATIENT_ID_RE.search(body)
+    if m:
+        patient_ids.add(m.group(1))
+    if url.endswith("/record/create") and method == "POST":
+        f = parse_qs(body)
+        flat = {k: (v[0] if isinstance(v, list) and v else "") for k, v in f.items()}
+        fields_seen = list(flat.keys())
+        if flat.get("Ins_name"):
+            ins_name = flat.get("Ins_name")
+    return ins_name, fields_seen
+
 # -----------------------
 # Helpers
 # -----------------------
 
+# path -> (st_mtime_ns, token): файл перачытваецца толькі калі ён змяніўся
+_TOKEN_CACHE: Dict[str, Tuple[int, str]] = {}
+
 def read_token_from_file(path: str) -> str:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Token file not found: {path}")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Token file not found: {path}") from None
+    cached = _TOKEN_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
     with open(path, "r", encoding="utf-8") as f:
         token = f.read().strip()
     if not token:
         raise ValueError("Token file is empty")
+    _TOKEN_CACHE[path] = (mtime, token)
     return token
 
 def _build_url(base_url: str, path: str, params: Dict[str, Any] | None = None) -> str:
     url = base_url.rstrip("/") + (path if path.startswith("/") else "/" + path)
     if params:
-        qs = urlencode(params, doseq=True)
+        # Звычайна ўсе значэнні скалярныя: urlencode патрэбны толькі для спісаў
+        if any(isinstance(v, (list, tuple)) for v in params.values()):
+            qs = urlencode(params, doseq=True)
+        else:
+            qs = "&".join(f"{quote_plus(str(k))}={quote_plus(str(v))}" for k, v in params.items())
         url = f"{url}?{qs}"
     return url
 
@@ -159,45 +265,125 @@ def _build_url(base_url: str, path: str, params: Dict[str, Any] | None = None) -
 
 def api_get(base_url: str, path: str, params: Dict[str, Any], timeout=20) -> ResponseShim:
     url = _build_url(base_url, path, params)
+    if pycurl is not None:
+        return _perform(url, timeout)
     cmd = _curl_cmd_base(timeout) + [url]
     return _run_curl(cmd)
 
 def api_post_form(base_url: str, path: str, data: Dict[str, Any], timeout=20) -> ResponseShim:
     url = _build_url(base_url, path, None)
-    form = urlencode(data, doseq=True)
+    # Форма кадуецца ў bytes адзін раз; цела не трапляе ў argv (вялікія description)
+    form = urlencode(data, doseq=True).encode("ascii")
+    if pycurl is not None:
+        return _perform(url, timeout, form)
     cmd = _curl_cmd_base(timeout) + [
         "-X", "POST",
         "-H", "Content-Type: application/x-www-form-urlencoded",
-        "--data", form,
+        "--data-binary", "@-",
         url,
     ]
-    return _run_curl(cmd)
+    return _run_curl(cmd, stdin=form)
 
 def safe_json(resp: ResponseShim) -> Any:
+    # resp.json() ужо спрабуе і orjson, і stdlib json: другая спроба не патрэбна
     try:
         return resp.json()
-    except Exception:
-        try:
-            return json.loads(resp.text)
-        except Exception:
-            return {"raw": resp.text}
+    except ValueError:
+        return {"raw": resp.text}
 
 # -----------------------
 # API operations
 # -----------------------
 
+# Кэш ідэмпатэнтных GET (напрамкі/дактары/паслугі): перазагрузка UI і
+# пераключэнне ўкладак не робяць паўторных запытаў на працягу TTL.
+CACHE_TTL_SECONDS = 60
+CACHE_MAX_ENTRIES = 256
+_CACHE: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+
+def _token_key(token: str) -> str:
+    # У ключы кэша трымаем кароткі хэш, а не сам токен
+    return hashlib.blake2b((token or "").encode(), digest_size=8).hexdigest()
+
+def _ttl_cached(cache_if=bool):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(base_url: str, token: str, *args):
+            key = (fn.__name__, base_url, _token_key(token), *args)
+            hit = _CACHE.get(key)
+            if hit is not None:
+                if time.monotonic() - hit[0] < CACHE_TTL_SECONDS:
+                    return hit[1]
+                _CACHE.pop(key, None)  # пратэрмінаваны запіс выдаляем адразу
+            value = fn(base_url, token, *args)
+            if cache_if(value):
+                _cache_store(key, value)
+            return value
+        return wrapper
+    return decorator
+
+def _cache_store(key: Tuple[Any, ...], value: Any) -> None:
+    now = time.monotonic()
+    if len(_CACHE) >= CACHE_MAX_ENTRIES:
+        # Спачатку чысцім пратэрмінаванае, потым — найстарэйшыя запісы
+        for k in [k for k, (ts, _) in _CACHE.items() if now - ts >= CACHE_TTL_SECONDS]:
+            del _CACHE[k]
+        while len(_CACHE) >= CACHE_MAX_ENTRIES:
+            del _CACHE[next(iter(_CACHE))]
+    _CACHE[key] = (now, value)
+
+def clear_cache() -> None:
+    _CACHE.clear()
+
+def _first(x: Dict[str, Any], keys: Tuple[str, ...], default: Any = None) -> Any:
+    # Першае непустое x[key] у парадку keys; спыняемся на першым трапленні
+    for k in keys:
+        v = x.get(k)
+        if v:
+            return v
+    return default
+
+# Магчымыя назвы палёў у адказах backend, у парадку прыярытэту
+_DIRECTION_ID_KEYS = ("id", "idDirection", "Id", "ID")
+_DIRECTION_NAME_KEYS = ("name", "title", "Name", "Title", "direction")
+_DOCTOR_ID_KEYS = ("id", "Id", "doctorId", "ID")
+_DOCTOR_NAME_KEYS = ("name", "fio", "FIO", "fullName")
+_SERVICE_ID_KEYS = ("id", "serviceId", "Id")
+_SERVICE_NAME_KEYS = ("name", "serviceName", "Name", "researchText")
+_SERVICE_DURATION_KEYS = ("duration", "Duration", "timePriemMinutes")
+_SLOT_START_KEYS = ("startAt", "start", "time")
+_SLOT_END_KEYS = ("endAt", "end")
+_RECORD_ID_KEYS = ("id", "recordId", "Id")
+_RECORD_DOCTOR_KEYS = ("doctorName", "doctor", "Doctor")
+_RECORD_START_KEYS = ("startAt", "date", "start")
+_RECORD_END_KEYS = ("endAt", "end")
+_RECORD_STATUS_KEYS = ("status", "Status", "status_pac")
+
+@_ttl_cached(cache_if=lambda r: bool(r[1]))
 def discover_directions(base_url: str, token: str) -> Tuple[str, List[Dict[str, Any]], str]:
     """Паспрабаваць некалькі магчымых эндпоінтаў для спіса напрамкаў."""
-    for ep in ENDPOINTS["directions_candidates"]:
-        try:
-            r = api_get(base_url, ep, params={"token": token})
-            if r.status_code == 200:
-                data = safe_json(r)
-                rows = normalize_directions(data)
-                if rows:
-                    return ep, rows, f"OK via {ep}"
-        except Exception:
-            continue
+    candidates = ENDPOINTS["directions_candidates"]
+
+    def probe(ep: str) -> List[Dict[str, Any]]:
+        r = api_get(base_url, ep, params={"token": token})
+        if r.status_code != 200:
+            return []
+        return normalize_directions(safe_json(r))
+
+    # Усе кандыдаты пытаюцца паралельна, але перамагае першы па парадку спіса,
+    # як і пры паслядоўным пераборы.
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    try:
+        futures = [executor.submit(probe, ep) for ep in candidates]
+        for ep, fut in zip(candidates, futures):
+            try:
+                rows = fut.result()
+            except Exception:
+                continue
+            if rows:
+                return ep, rows, f"OK via {ep}"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
     return "", [], "Не атрымалася аўтаматычна атрымаць спіс напрамкаў. Увядзіце ID напрамку ўручную."
 
 def normalize_directions(data: Any) -> List[Dict[str, Any]]:
@@ -206,8 +392,8 @@ def normalize_directions(data: Any) -> List[Dict[str, Any]]:
         for x in data:
             if isinstance(x, dict):
                 d = {
-                    "id": x.get("id") or x.get("idDirection") or x.get("Id") or x.get("ID"),
-                    "name": x.get("name") or x.get("title") or x.get("Name") or x.get("Title") or x.get("direction"),
+                    "id": _first(x, _DIRECTION_ID_KEYS),
+                    "name": _first(x, _DIRECTION_NAME_KEYS),
                 }
                 if d["id"] is not None:
                     rows.append(d)
@@ -219,6 +405,7 @@ def normalize_directions(data: Any) -> List[Dict[str, Any]]:
                 return normalize_directions(arr)
     return []
 
+@_ttl_cached()
 def get_doctors(base_url: str, token: str, id_direction: Optional[str]) -> List[Dict[str, Any]]:
     params = {"token": token}
     if id_direction:
@@ -234,25 +421,25 @@ def normalize_doctors(data: Any) -> List[Dict[str, Any]]:
     if isinstance(data, list):
         iterable = data
     elif isinstance(data, dict):
-        iterable = data.get("data") or data.get("items") or data.get("result") or data.get("doctors") or []
+        iterable = _first(data, ("data", "items", "result", "doctors"), [])
     else:
         iterable = []
+    # Дэдуплікацыя па id адразу ў першым праходзе
+    seen = set()
+    append = out.append
     for x in iterable:
         if isinstance(x, dict):
-            out.append({
-                "id": x.get("id") or x.get("Id") or x.get("doctorId") or x.get("ID"),
-                "name": x.get("name") or x.get("fio") or x.get("FIO") or x.get("fullName") or "",
-                "raw": x,
-            })
-    # Deduplicate by id
-    seen = set()
-    uniq = []
-    for d in out:
-        if d["id"] and d["id"] not in seen:
-            uniq.append(d)
-            seen.add(d["id"])
-    return uniq
+            _id = _first(x, _DOCTOR_ID_KEYS)
+            if _id and _id not in seen:
+                seen.add(_id)
+                append({
+                    "id": _id,
+                    "name": _first(x, _DOCTOR_NAME_KEYS, ""),
+                    "raw": x,
+                })
+    return out
 
+@_ttl_cached()
 def get_service_duration(base_url: str, token: str, id_direction: Optional[str]) -> List[Dict[str, Any]]:
     if not id_direction:
         return []
@@ -275,9 +462,9 @@ def normalize_services(data: Any) -> List[Dict[str, Any]]:
     for x in iterable:
         if isinstance(x, dict):
             out.append({
-                "id": x.get("id") or x.get("serviceId") or x.get("Id"),
-                "name": x.get("name") or x.get("serviceName") or x.get("Name") or x.get("researchText") or "",
-                "duration": x.get("duration") or x.get("Duration") or x.get("timePriemMinutes"),
+                "id": _first(x, _SERVICE_ID_KEYS),
+                "name": _first(x, _SERVICE_NAME_KEYS, ""),
+                "duration": _first(x, _SERVICE_DURATION_KEYS),
                 "raw": x,
             })
     return out
@@ -297,73 +484,82 @@ def get_schedule(base_url: str, token: str, doctor_id: str, start_date: str, end
     data = safe_json(r)
     return normalize_slots(data)
 
-def normalize_slots(data: Any) -> List[Dict[str, Any]]:
-    """Уніфікацыя розных форматаў раскладу ў плоскі спіс слотаў."""
-    slots: List[Dict[str, Any]] = []
+def get_schedules_bulk(base_url: str, token: str, doctor_ids: List[str], start_date: str, end_date: str, service_id: Optional[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Расклад для некалькіх дактароў адразу: запыты ідуць паралельна праз агульны пул злучэнняў."""
+    ids = list(dict.fromkeys(str(d) for d in doctor_ids if d))
+    if not ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(ids), 8)) as ex:
+        futures = {d: ex.submit(get_schedule, base_url, token, d, start_date, end_date, service_id) for d in ids}
+        return {d: fut.result() for d, fut in futures.items()}
 
-    def add_slot(start: str, end: Optional[str] = None, raw: Any = None) -> None:
-        slots.append({"startAt": start, "endAt": end, "raw": raw})
+def _is_clock(value: Any) -> bool:
+    # "HH:MM" без даты — патрабуе прэфікса з даты блока
+    return isinstance(value, str) and len(value) <= 5 and ":" in value
 
+def _iter_nested_slots(data: List[Any]):
     # Варыянт 1: nested-спісы (як у цябе)
-    if isinstance(data, list):
-        for item in data:
-            if not isinstance(item, dict):
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        for dates in item.values():
+            if not isinstance(dates, list):
                 continue
-            for _, dates in item.items():
-                if not isinstance(dates, list):
+            for block in dates:
+                if not isinstance(block, dict):
                     continue
-                for block in dates:
-                    if not isinstance(block, dict):
+                # meta будуецца адзін раз на блок і толькі калі ў блоку ёсць спісы
+                meta = None
+                for date_str, day_slots in block.items():
+                    if not isinstance(day_slots, list):
                         continue
-                    meta = {k: v for k, v in block.items() if not isinstance(v, list)}
-                    for date_str, day_slots in block.items():
-                        if not isinstance(day_slots, list):
+                    if meta is None:
+                        meta = {k: v for k, v in block.items() if not isinstance(v, list)}
+                    prefix = f"{date_str} "
+                    for s in day_slots:
+                        if not isinstance(s, dict):
                             continue
-                        for s in day_slots:
-                            if not isinstance(s, dict):
-                                continue
-                            st = s.get("startAt") or s.get("start") or s.get("time")
-                            en = s.get("endAt") or s.get("end")
-                            if not st:
-                                continue
-                            if isinstance(st, str) and len(st) <= 5 and ":" in st:
-                                st_full = f"{date_str} {st}"
-                            else:
-                                st_full = st
-                            if isinstance(en, str) and len(en) <= 5 and ":" in en:
-                                en_full = f"{date_str} {en}"
-                            else:
-                                en_full = en
-                            raw = {"date": date_str, **meta, **s}
-                            add_slot(st_full, en_full, raw)
-        if slots:
-            return slots
-
+                        st = _first(s, _SLOT_START_KEYS)
+                        if not st:
+                            continue
+                        en = _first(s, _SLOT_END_KEYS)
+                        yield {
+                            "startAt": prefix + st if _is_clock(st) else st,
+                            "endAt": prefix + en if _is_clock(en) else en,
+                            "raw": {"date": date_str, **meta, **s},
+                        }
+
+def _iter_day_time_slots(data: Dict[str, Any]):
     # Варыянт 2: dict {docId: [ {date, times:[..]} ]}
-    if isinstance(data, dict):
-        for v in data.values():
-            if isinstance(v, list):
-                for day in v:
-                    if isinstance(day, dict):
-                        date = day.get("date") or day.get("Date")
-                        times = day.get("times") or day.get("Times") or []
-                        if isinstance(times, list) and date:
-                            for t in times:
-                                if isinstance(t, str):
-                                    add_slot(f"{date} {t}", None, {"date": date, "time": t})
-        if slots:
-            return slots
-
+    for v in data.values():
+        if not isinstance(v, list):
+            continue
+        for day in v:
+            if not isinstance(day, dict):
+                continue
+            date = _first(day, ("date", "Date"))
+            times = _first(day, ("times", "Times"), [])
+            if isinstance(times, list) and date:
+                for t in times:
+                    if isinstance(t, str):
+                        yield {"startAt": f"{date} {t}", "endAt": None, "raw": {"date": date, "time": t}}
+
+def _iter_flat_slots(data: List[Any]):
     # Варыянт 3: ужо плоскі спіс
-    if isinstance(data, list):
-        for x in data:
-            if isinstance(x, dict):
-                start = x.get("startAt") or x.get("start") or x.get("time")
-                end   = x.get("endAt") or x.get("end")
-                if start:
-                    add_slot(start, end, x)
+    for x in data:
+        if isinstance(x, dict):
+            start = _first(x, _SLOT_START_KEYS)
+            if start:
+                yield {"startAt": start, "endAt": _first(x, _SLOT_END_KEYS), "raw": x}
 
-    return slots
+def normalize_slots(data: Any) -> List[Dict[str, Any]]:
+    """Уніфікацыя розных форматаў раскладу ў плоскі спіс слотаў."""
+    # Спіс праходзіцца другі раз (плоскі фармат) толькі калі nested нічога не даў
+    if isinstance(data, list):
+        return list(_iter_nested_slots(data)) or list(_iter_flat_slots(data))
+    if isinstance(data, dict):
+        return list(_iter_day_time_slots(data))
+    return []
 
 def create_record(base_url: str, token: str, doctor_id: str, patient_id: str, start_at: str, end_at: Optional[str], description: str, insurer: str, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     data = {
@@ -404,24 +600,18 @@ def normalize_records(data: Any) -> List[Dict[str, Any]]:
         else:
             iterable = data
     elif isinstance(data, dict):
-        iterable = (
-            data.get("records")
-            or data.get("items")
-            or data.get("data")
-            or data.get("result")
-            or []
-        )
+        iterable = _first(data, ("records", "items", "data", "result"), [])
     else:
         iterable = []
     for x in iterable:
         if not isinstance(x, dict):
             continue
         items.append({
-            "recordId": x.get("id") or x.get("recordId") or x.get("Id"),
-            "doctor": x.get("doctorName") or x.get("doctor") or x.get("Doctor"),
-            "startAt": x.get("startAt") or x.get("date") or x.get("start"),
-            "endAt": x.get("endAt") or x.get("end"),
-            "status": x.get("status") or x.get("Status") or x.get("status_pac"),
+            "recordId": _first(x, _RECORD_ID_KEYS),
+            "doctor": _first(x, _RECORD_DOCTOR_KEYS),
+            "startAt": _first(x, _RECORD_START_KEYS),
+            "endAt": _first(x, _RECORD_END_KEYS),
+            "status": _first(x, _RECORD_STATUS_KEYS),
             "raw": x,
         })
     return items
@@ -441,6 +631,16 @@ def cancel_record(base_url: str, token: str, record_id: str,
 # Gradio UI
 # -----------------------
 
+def _dump(obj: Any) -> str:
+    # JSON для панэляў gr.Code; orjson хутчэй на вялікіх спісах слотаў
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+@functools.lru_cache(maxsize=1)
 def _in_notebook() -> bool:
     """Дэтэкцыя Jupyter/Colab для аўта-запуску UI."""
     try:
@@ -465,15 +665,17 @@ def launch_gradio():
             base_url = gr.Textbox(value=BASE_URL_DEFAULT, label="Base URL")
             token_file = gr.Textbox(value="token.txt", label="Шлях да файла з токенам")
             load_btn = gr.Button("Загрузіць токен і напрамкі")
+            refresh_cache_btn = gr.Button("Абнавіць кэш")
         with gr.Row():
             har_file = gr.Textbox(value="/content/amedismed_full.by.har", label="Шлях да HAR (неабавязкова)")
             har_btn = gr.Button("Аўта-выяўленне з HAR")
 
         token_state = gr.State("")
-        doctor_map_state = gr.State("{}")
-        service_map_state = gr.State("{}")
-        slot_map_state = gr.State("{}")
-        records_map_state = gr.State("{}")
+        # Мапы label -> ID/слот трымаюцца ў State як dict, без json.dumps/loads на кожны клік
+        doctor_map_state = gr.State({})
+        service_map_state = gr.State({})
+        slot_map_state = gr.State({})
+        records_map_state = gr.State({})
         patient_autofill_state = gr.State("")
         insurer_autofill_state = gr.State("")
         info = gr.Textbox(label="Інфо", interactive=False)
@@ -512,6 +714,7 @@ def launch_gradio():
 
         # --- Handlers ---
         def ui_load_token(path, base_url):
+            clear_cache()
             try:
                 token = read_token_from_file(path)
                 used_ep, dirs, msg = discover_directions(base_url, token)
@@ -522,6 +725,12 @@ def launch_gradio():
 
         load_btn.click(ui_load_token, inputs=[token_file, base_url], outputs=[token_state, info, directions, dirs_table])
 
+        def ui_refresh_cache():
+            clear_cache()
+            return gr.update(value="Кэш ачышчаны: наступныя запыты пойдуць на сервер.")
+
+        refresh_cache_btn.click(ui_refresh_cache, inputs=[], outputs=[info])
+
         def ui_har_autofill(har_path):
             data = parse_har_for_patient(har_path)
             msg = []
@@ -543,9 +752,9 @@ def launch_gradio():
                 docs = get_doctors(base, token, direction_id or None)
                 choices = [f"{d['id']} — {d['name']}".strip() for d in docs]
                 id_map = {choices[i]: str(docs[i]['id']) for i in range(len(docs))}
-                return gr.update(choices=choices, value=(choices[0] if choices else None)), json.dumps(docs, ensure_ascii=False, indent=2), json.dumps(id_map, ensure_ascii=False)
+                return gr.update(choices=choices, value=(choices[0] if choices else None)), _dump(docs), id_map
             except Exception as e:
-                return gr.update(choices=[], value=None), f"Памылка: {e}", "{}"
+                return gr.update(choices=[], value=None), f"Памылка: {e}", {}
 
         fetch_doctors_btn.click(ui_fetch_doctors, inputs=[base_url, token_state, directions], outputs=[doctors, doctors_json, doctor_map_state])
 
@@ -554,24 +763,25 @@ def launch_gradio():
                 services_list = get_service_duration(base, token, direction_id or None)
                 svc_choices = [f"{s['id']} — {s['name']} ({s.get('duration','?')} мiн)" if s.get('name') else str(s['id']) for s in services_list]
                 svc_map = {svc_choices[i]: str(services_list[i]['id']) for i in range(len(services_list))}
-                return gr.update(choices=svc_choices, value=(svc_choices[0] if svc_choices else None)), json.dumps(services_list, ensure_ascii=False, indent=2), json.dumps(svc_map, ensure_ascii=False)
+                return gr.update(choices=svc_choices, value=(svc_choices[0] if svc_choices else None)), _dump(services_list), svc_map
             except Exception as e:
-                return gr.update(choices=[], value=None), f"Памылка: {e}", "{}"
+                return gr.update(choices=[], value=None), f"Памылка: {e}", {}
 
         fetch_services_btn.click(ui_fetch_services, inputs=[base_url, token_state, directions], outputs=[services, services_json, service_map_state])
 
-        def ui_fetch_slots(base, token, doctor_choice, doctor_map_json, sdate, edate, service_choice, svc_map_json):
+        def ui_fetch_direction_bundle(base, token, direction_id):
+            # Дактары і паслугі напрамку загружаюцца паралельна, а не двума клікамі запар
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                docs = ex.submit(ui_fetch_doctors, base, token, direction_id)
+                svcs = ex.submit(ui_fetch_services, base, token, direction_id)
+                return (*docs.result(), *svcs.result())
+
+        directions.change(ui_fetch_direction_bundle, inputs=[base_url, token_state, directions], outputs=[doctors, doctors_json, doctor_map_state, services, services_json, service_map_state])
+
+        def ui_fetch_slots(base, token, doctor_choice, doctor_map, sdate, edate, service_choice, svc_map):
             try:
-                try:
-                    doctor_map = json.loads(doctor_map_json or "{}")
-                except Exception:
-                    doctor_map = {}
-                doctor_id = doctor_map.get(doctor_choice) or doctor_choice or ""
-                try:
-                    svc_map = json.loads(svc_map_json or "{}")
-                except Exception:
-                    svc_map = {}
-                service_id = svc_map.get(service_choice)
+                doctor_id = (doctor_map or {}).get(doctor_choice) or doctor_choice or ""
+                service_id = (svc_map or {}).get(service_choice)
                 if not doctor_id:
                     raise ValueError("Не абраны доктар")
                 if not service_id:
@@ -584,46 +794,36 @@ def launch_gradio():
                         label += f" — {s['endAt']}"
                     labels.append(label)
                 mapping = {labels[i]: slots_list[i] for i in range(len(slots_list))}
-                return gr.update(choices=labels, value=(labels[0] if labels else None)), json.dumps(slots_list, ensure_ascii=False, indent=2), json.dumps(mapping, ensure_ascii=False)
+                return gr.update(choices=labels, value=(labels[0] if labels else None)), _dump(slots_list), mapping
             except Exception as e:
-                return gr.update(choices=[], value=None), f"Памылка: {e}", "{}"
+                return gr.update(choices=[], value=None), f"Памылка: {e}", {}
 
         fetch_slots_btn.click(ui_fetch_slots, inputs=[base_url, token_state, doctors, doctor_map_state, start_date, end_date, services, service_map_state], outputs=[slots, slots_json, slot_map_state])
 
-        def ui_create_record(base, token, doctor_choice, doctor_map_json, patient_id, slot_choice, slot_map_json, desc, insurer, service_choice, svc_map_json):
+        def ui_create_record(base, token, doctor_choice, doctor_map, patient_id, slot_choice, slot_map, desc, insurer, service_choice, svc_map):
             try:
-                try:
-                    doctor_map = json.loads(doctor_map_json or "{}")
-                except Exception:
-                    doctor_map = {}
-                doctor_id = doctor_map.get(doctor_choice) or doctor_choice or ""
+                doctor_id = (doctor_map or {}).get(doctor_choice) or doctor_choice or ""
                 if not doctor_id:
                     raise ValueError("Не абраны доктар")
                 if not patient_id:
                     raise ValueError("Пацыент ID абавязковы")
-                slot_map = json.loads(slot_map_json or "{}")
-                slot = slot_map.get(slot_choice) or {}
+                slot = (slot_map or {}).get(slot_choice) or {}
                 start_at = slot.get("startAt") or ""
                 end_at = slot.get("endAt") or ""
                 if not start_at:
                     raise ValueError("Не абраны слот")
-                extra: Dict[str, Any] = {}
                 raw = slot.get("raw") or {}
-                for key in ["officeId", "cabinetId", "serviceId", "directionId", "office", "cabinet"]:
-                    if raw.get(key) is not None:
-                        extra[key] = raw.get(key)
-                try:
-                    svc_map = json.loads(svc_map_json or "{}")
-                    chosen_service_id = svc_map.get(service_choice)
-                    if chosen_service_id and not extra.get("serviceId"):
-                        extra["serviceId"] = chosen_service_id
-                except Exception:
-                    pass
+                extra: Dict[str, Any] = {
+                    key: raw[key] for key in SLOT_EXTRA_KEYS if raw.get(key) is not None
+                } if raw else {}
+                chosen_service_id = (svc_map or {}).get(service_choice)
+                if chosen_service_id and not extra.get("serviceId"):
+                    extra["serviceId"] = chosen_service_id
                 if end_at and len(end_at) <= 5 and ":" in end_at:
                     date_part = start_at.split(" ")[0]
                     end_at = f"{date_part} {end_at}"
                 res = create_record(base, token, doctor_id, patient_id, start_at, end_at, desc or "", insurer or "", extra=extra)
-                return json.dumps(res, ensure_ascii=False, indent=2)
+                return _dump(res)
             except Exception as e:
                 return f"Памылка: {e}"
 
@@ -633,23 +833,22 @@ def launch_gradio():
             try:
                 items = list_patient_records(base, token, patient_api_id)
                 if not items:
-                    return gr.update(choices=[]), json.dumps(items, ensure_ascii=False, indent=2)
+                    return gr.update(choices=[]), {}
                 labels = [f"{it.get('recordId')} — {it.get('startAt')} — {it.get('status')}" for it in items]
                 mapping = {labels[i]: str(items[i].get("recordId")) for i in range(len(items))}
-                return gr.update(choices=labels, value=labels[0]), json.dumps(mapping, ensure_ascii=False)
+                return gr.update(choices=labels, value=labels[0]), mapping
             except Exception as e:
-                return gr.update(choices=[]), f"Памылка: {e}"
+                return gr.update(choices=[]), {}
 
         refresh_records_btn.click(ui_list_records, inputs=[base_url, token_state, patient_id_tb], outputs=[records, records_map_state])
 
-        def ui_cancel_record(base, token, record_label, mapping_json, cancel_status):
+        def ui_cancel_record(base, token, record_label, mapping, cancel_status):
             try:
-                mapping = json.loads(mapping_json or "{}")
-                record_id = mapping.get(record_label) or record_label
+                record_id = (mapping or {}).get(record_label) or record_label
                 if not record_id:
                     raise ValueError("Абярыце запіс для адмены")
                 res = cancel_record(base, token, record_id, cancel_status or "CAN")
-                return json.dumps(res, ensure_ascii=False, indent=2)
+                return _dump(res)
             except Exception as e:
                 return f"Памылка: {e}"
 
@@ -6,10 +6,11 @@ import os
 from dotenv import load_dotenv
 import argparse
 import asyncio
+import contextlib
 import logging
-from collections import deque
+from logging.handlers import MemoryHandler
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import AsyncIterator, Iterator, Optional
 
 from google.adk import Runner
 from google.adk.artifacts.in_memory_artifact_service import (
@@ -19,7 +20,8 @@ from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.genai import types
 
-from agent import AgentSettings, build_agent
+from agent import AgentSettings, build_agent, warmup_tools
+from amedis_client import async_http_client
 
 # Load environment variables from .env file
 load_dotenv()
@@ -31,9 +33,12 @@ from gemini_token import (
 
 
 _DEFAULT_LOG_PATH = Path("amedis_agent_errors.log")
-_EXIT_COMMANDS = {"/exit", ":exit", "выход", "выхад", "quit"}
+_EXIT_COMMANDS = frozenset({"/exit", ":exit", "выход", "выхад", "quit"})
 _ERROR_COMMAND = ":errors"
 _FLASH_FAMILY_PREFIX = "gemini-2.5-flash"
+_CONSOLE_FORMAT = "[%(levelname)s] %(name)s: %(message)s"
+_console_configured = False
+_LOG_BUFFER_CAPACITY = 64
 
 
 def _validate_model_choice(value: str) -> str:
@@ -51,25 +56,15 @@ def _validate_model_choice(value: str) -> str:
 def _configure_logging(log_path: Optional[Path]) -> Optional[Path]:
     """Настроіць лагаванне для кансолі і файла памылак."""
 
+    global _console_configured
+
     root_logger = logging.getLogger()
-    if not root_logger.handlers:
-        logging.basicConfig(level=logging.INFO)
+    # Кансоль настройваецца адзін раз, нават калі main() выклікаецца паўторна.
+    if not _console_configured:
+        logging.basicConfig(level=logging.INFO, format=_CONSOLE_FORMAT)
+        _console_configured = True
     root_logger.setLevel(logging.INFO)
 
-    # Пераканаемся, што няма дубляваных stream-хэндлераў.
-    has_stream_handler = any(
-        isinstance(handler, logging.StreamHandler)
-        and not isinstance(handler, logging.FileHandler)
-        for handler in root_logger.handlers
-    )
-    if not has_stream_handler:
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(
-            logging.Formatter("[%(levelname)s] %(name)s: %(message)s")
-        )
-        root_logger.addHandler(console_handler)
-
     if not log_path:
         return None
 
@@ -81,7 +76,16 @@ def _configure_logging(log_path: Optional[Path]) -> Optional[Path]:
     file_handler.setFormatter(
         logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
     )
-    root_logger.addHandler(file_handler)
+    # Запісы збіраюцца пачкамі, каб серыя памылак не блакавала агента на дыску.
+    # logging.shutdown() пры выхадзе скідае буфер (flushOnClose).
+    buffered_handler = MemoryHandler(
+        capacity=_LOG_BUFFER_CAPACITY,
+        flushLevel=logging.CRITICAL,
+        target=file_handler,
+        flushOnClose=True,
+    )
+    buffered_handler.setLevel(logging.ERROR)
+    root_logger.addHandler(buffered_handler)
     logging.captureWarnings(True)
     root_logger.info("Памылкі будуць захоўвацца ў %s", log_path)
     return log_path
@@ -107,22 +111,65 @@ async def _ensure_session(
     )
 
 
-def _iter_agent_events(
+async def _prepare_session(
+    session_service: InMemorySessionService,
+    *,
+    app_name: str,
+    user_id: str,
+    session_id: Optional[str] = None,
+):
+    """Стварае сеанс; інструменты награваюцца паралельна са стварэннем сесіі."""
+
+    session, _ = await asyncio.gather(
+        _ensure_session(
+            session_service,
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+        ),
+        warmup_tools(),
+    )
+    return session
+
+
+@contextlib.contextmanager
+def _dialog_loop() -> Iterator[asyncio.AbstractEventLoop]:
+    """Адзін цыкл падзей на ўвесь дыялог з адкрытым async HTTP-кліентам.
+
+    Runner.run стварае новы цыкл на кожны ход, таму кліент і яго злучэнні
+    не перажывалі б паведамленне; тут яны жывуць да выхаду з CLI.
+    """
+
+    loop = asyncio.new_event_loop()
+    scope = async_http_client()
+    try:
+        loop.run_until_complete(scope.__aenter__())
+        try:
+            yield loop
+        finally:
+            loop.run_until_complete(scope.__aexit__(None, None, None))
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+
+async def _iter_agent_events(
     runner: Runner,
     *,
     user_id: str,
     session_id: str,
     message: str,
-) -> Iterable[str]:
+) -> AsyncIterator[str]:
     """Пераўтварае падзеі runner у чалавекочытальны тэкст."""
 
     content = types.Content(
         role="user", parts=[types.Part(text=message.strip())]
     )
 
-    response_buffer: deque[str] = deque()
+    got_any = False
 
-    for event in runner.run(
+    async for event in runner.run_async(
         user_id=user_id,
         session_id=session_id,
         new_message=content,
@@ -138,17 +185,41 @@ def _iter_agent_events(
         if not event.content or not event.content.parts:
             continue
 
-        text_parts = [
-            part.text for part in event.content.parts if getattr(part, "text", None)
-        ]
-        if text_parts:
-            response_buffer.extend(text_parts)
-            yield "\n".join(text_parts)
+        # Часткі аддаюцца па адной, без буферызацыі ўсяго адказу.
+        for part in event.content.parts:
+            text = getattr(part, "text", None)
+            if text:
+                got_any = True
+                yield text
 
-    if not response_buffer:
+    if not got_any:
         yield "(Агент не вярнуў адказ.)"
 
 
+async def _print_agent_reply(runner: Runner, **kwargs: str) -> None:
+    async for reply in _iter_agent_events(runner, **kwargs):
+        if reply:
+            print(f"Агент: {reply}")
+
+
+_TAIL_BLOCK_SIZE = 8192
+
+
+def _tail_lines(path: Path, limit: int) -> list[str]:
+    """Чытае толькі апошнія ``limit`` радкоў, блокамі з канца файла."""
+
+    with path.open("rb") as fh:
+        pos = fh.seek(0, os.SEEK_END)
+        data = bytearray()
+        # limit + 1 пераводаў радка гарантуюць, што першы радок хваста поўны.
+        while pos > 0 and data.count(b"\n") <= limit:
+            step = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            fh.seek(pos)
+            data[:0] = fh.read(step)
+    return data.decode("utf-8", errors="replace").splitlines()[-limit:]
+
+
 def _show_error_logs(log_path: Optional[Path], *, limit: int = 20) -> None:
     """Друкуе апошнія радкі з файла памылак."""
 
@@ -159,10 +230,10 @@ def _show_error_logs(log_path: Optional[Path], *, limit: int = 20) -> None:
         print("Пакуль няма запісаных памылак.")
         return
 
-    with log_path.open("r", encoding="utf-8") as fh:
-        lines = fh.readlines()
-
-    tail = lines[-limit:]
+    # Буферызаваныя запісы павінны трапіць у файл да чытання.
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    tail = _tail_lines(log_path, limit)
     if not tail:
         print("Пакуль няма запісаных памылак.")
         return
@@ -198,6 +269,7 @@ def _parse_args() -> argparse.Namespace:
         nargs="?",
         const="gemini-2.5-flash-lite",
         default=None,
+        type=_validate_model_choice,
         metavar="MODEL",
         help=(
             "Хуткае пераключэнне на gemini-2.5-flash-lite або іншы яе варыянт. "
@@ -286,7 +358,7 @@ def main() -> None:
     settings = AgentSettings()
     model_choice: Optional[str] = args.model
     if args.flash_lite is not None:
-        model_choice = _validate_model_choice(args.flash_lite)
+        model_choice = args.flash_lite
     if model_choice:
         settings.model = model_choice
     if args.agent_name:
@@ -300,66 +372,62 @@ def main() -> None:
     memory_service = InMemoryMemoryService()
     artifact_service = InMemoryArtifactService()
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
+    with _dialog_loop() as loop:
         session = loop.run_until_complete(
-            _ensure_session(
+            _prepare_session(
                 session_service,
                 app_name=settings.name,
                 user_id=args.user_id,
                 session_id=args.session_id,
             )
         )
-    finally:
-        loop.close()
 
-    runner = Runner(
-        app_name=settings.name,
-        agent=agent,
-        session_service=session_service,
-        memory_service=memory_service,
-        artifact_service=artifact_service,
-    )
-
-    print("Прывітанне! Уводзьце паведамленні для агента. Для выхаду друкуйце /exit.")
-    print(
-        "Каб паглядзець апошнія памылкі, выкарыстайце каманду :errors."
-    )
-
-    session_id = session.id
-    while True:
-        try:
-            user_message = input("Вы: ").strip()
-        except EOFError:
-            print()
-            break
-
-        if not user_message:
-            continue
+        runner = Runner(
+            app_name=settings.name,
+            agent=agent,
+            session_service=session_service,
+            memory_service=memory_service,
+            artifact_service=artifact_service,
+        )
 
-        lower = user_message.lower()
-        if lower in _EXIT_COMMANDS:
-            break
-        if user_message.strip().lower() == _ERROR_COMMAND:
-            _show_error_logs(log_path)
-            continue
+        print("Прывітанне! Уводзьце паведамленні для агента. Для выхаду друкуйце /exit.")
+        print(
+            "Каб паглядзець апошнія памылкі, выкарыстайце каманду :errors."
+        )
 
-        try:
-            for reply in _iter_agent_events(
-                runner,
-                user_id=args.user_id,
-                session_id=session_id,
-                message=user_message,
-            ):
-                if reply:
-                    print(f"Агент: {reply}")
-        except Exception as exc:  # pragma: no cover - інтэрактыўны safeguard
-            logging.exception("Непрадбачаная памылка: %s", exc)
-            print(
-                "Адбылася памылка, падрабязнасці глядзіце ў лагу: ",
-                log_path or "(лог адключаны)",
-            )
+        session_id = session.id
+        while True:
+            try:
+                user_message = input("Вы: ").strip()
+            except EOFError:
+                print()
+                break
+
+            if not user_message:
+                continue
+
+            lower = user_message.lower()
+            if lower in _EXIT_COMMANDS:
+                break
+            if lower == _ERROR_COMMAND:
+                _show_error_logs(log_path)
+                continue
+
+            try:
+                loop.run_until_complete(
+                    _print_agent_reply(
+                        runner,
+                        user_id=args.user_id,
+                        session_id=session_id,
+                        message=user_message,
+                    )
+                )
+            except Exception as exc:  # pragma: no cover - інтэрактыўны safeguard
+                logging.exception("Непрадбачаная памылка: %s", exc)
+                print(
+                    "Адбылася памылка, падрабязнасці глядзіце ў лагу: ",
+                    log_path or "(лог адключаны)",
+                )
 
     print("Да пабачэння!")
 
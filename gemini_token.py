@@ -9,6 +9,7 @@ filesystem or environment management code.
 
 from __future__ import annotations
 
+import functools
 import os
 from pathlib import Path
 from typing import Literal, Optional, Tuple
@@ -25,18 +26,25 @@ def resolve_token_path(path: Optional[Path | str] = None) -> Path:
 
     if path:
         return Path(path).expanduser()
+    return _default_token_path(
+        os.getenv(TOKEN_PATH_ENV), os.getenv("XDG_CONFIG_HOME"), os.getenv("HOME")
+    )
 
-    override = os.getenv(TOKEN_PATH_ENV)
+
+@functools.lru_cache(maxsize=8)
+def _default_token_path(
+    override: Optional[str], config_home: Optional[str], home_env: Optional[str]
+) -> Path:
+    # Keyed on the environment values, so changes to them (e.g. monkeypatched
+    # in tests) are picked up while repeated lookups skip ``expanduser``.
     if override:
         return Path(override).expanduser()
 
-    config_home = os.getenv("XDG_CONFIG_HOME")
     if config_home:
         base_dir = Path(config_home).expanduser()
     else:
         # Prefer $HOME if provided (works cross-platform and aligns with tests),
         # otherwise fall back to the platform-detected home directory.
-        home_env = os.getenv("HOME")
         if home_env:
             base_dir = Path(home_env).expanduser() / ".config"
         else:
@@ -71,15 +79,14 @@ def ensure_gemini_token(
         token was obtained (``"cli"``, ``"env"``, ``"file"`` or ``"none"``).
     """
 
-    resolved_path = resolve_token_path(path)
-
+    # The path is resolved only on branches that touch the filesystem.
     if token is not None:
         cleaned = token.strip()
         if not cleaned:
             raise ValueError("Gemini API token cannot be empty")
-        os.environ[GEMINI_API_KEY_ENV] = cleaned
+        _set_env(cleaned)
         if persist:
-            _write_token(resolved_path, cleaned)
+            _write_token(resolve_token_path(path), cleaned)
         return cleaned, "cli"
 
     env_token = os.environ.get(GEMINI_API_KEY_ENV)
@@ -87,17 +94,23 @@ def ensure_gemini_token(
         cleaned_env = env_token.strip()
         if cleaned_env:
             if persist:
-                _write_token(resolved_path, cleaned_env)
+                _write_token(resolve_token_path(path), cleaned_env)
             return cleaned_env, "env"
 
-    file_token = _read_token(resolved_path)
+    file_token = _read_token(resolve_token_path(path))
     if file_token:
-        os.environ[GEMINI_API_KEY_ENV] = file_token
+        _set_env(file_token)
         return file_token, "file"
 
     return None, "none"
 
 
+def _set_env(value: str) -> None:
+    # Skip the putenv() round-trip when the variable already holds the token.
+    if os.environ.get(GEMINI_API_KEY_ENV) != value:
+        os.environ[GEMINI_API_KEY_ENV] = value
+
+
 def _read_token(path: Path) -> Optional[str]:
     try:
         contents = path.read_text(encoding="utf-8").strip()
@@ -107,6 +120,8 @@ def _read_token(path: Path) -> Optional[str]:
 
 
 def _write_token(path: Path, token: str) -> None:
+    if _read_token(path) == token:
+        return
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(f"{token}\n", encoding="utf-8")
 
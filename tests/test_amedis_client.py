@@ -1,3 +1,4 @@
+import asyncio
 import json
 import pathlib
 import sys
@@ -16,6 +17,14 @@ def make_response(payload: Any, status: int = 200) -> client.ResponseShim:
     return client.ResponseShim(status_code=status, text=json.dumps(payload))
 
 
+@pytest.fixture(autouse=True)
+def _clear_client_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AMEDIS_CACHE_DIR", str(tmp_path / "cache"))
+    client.invalidate_cache()
+    yield
+    client.invalidate_cache()
+
+
 def test_curl_cmd_base_contains_tls_flags():
     cmd = client._curl_cmd_base()
     assert "--insecure" in cmd
@@ -27,12 +36,58 @@ def test_curl_cmd_base_contains_tls_flags():
         assert "DEFAULT:@SECLEVEL=1" in cmd
 
 
+def test_split_curl_output_skips_all_header_blocks():
+    out = (
+        b"HTTP/1.1 100 Continue\r\n\r\n"
+        b"HTTP/1.1 201 Created\r\nContent-Type: application/json\r\n\r\n"
+        b'{"text": "a\r\n\r\nb"}'
+    )
+    status, body = client._split_curl_output(out)
+    assert status == 201
+    assert body == b'{"text": "a\r\n\r\nb"}'
+
+
+def test_legacy_ssl_context_skips_verification():
+    ctx = client._legacy_ssl_context()
+    assert ctx.verify_mode == client.ssl.CERT_NONE
+    assert ctx.check_hostname is False
+
+
+def test_api_get_uses_pooled_session(monkeypatch):
+    requested = []
+
+    class FakeResponse:
+        status_code = 200
+        content = '{"ok": "так"}'.encode("utf-8")
+
+    class FakeSession:
+        def get(self, url, timeout):
+            requested.append((url, timeout))
+            return FakeResponse()
+
+    monkeypatch.setattr(client, "_use_curl", lambda: False)
+    monkeypatch.setattr(client, "_session", lambda: FakeSession())
+
+    response = client._api_get("https://example.test/", "/doctors", {"token": "a b"})
+
+    assert requested == [("https://example.test/doctors?token=a+b", client._DEFAULT_TIMEOUT)]
+    assert response.status_code == 200
+    assert response.json() == {"ok": "так"}
+
+
+def test_safe_json_decodes_bytes_and_falls_back():
+    assert client._safe_json(client.ResponseShim(200, content='{"a": "б"}'.encode())) == {"a": "б"}
+    lenient = client._safe_json(client.ResponseShim(200, content=b'{"a": NaN}'))
+    assert lenient["a"] != lenient["a"]
+    assert client._safe_json(client.ResponseShim(200, text="<html>")) == {"raw": "<html>"}
+
+
 def test_discover_directions_selects_first_success(monkeypatch):
     calls = []
 
     def fake_api_get(base_url: str, path: str, params: dict, timeout: int = 20):
         calls.append((base_url, path, params))
-        if len(calls) == 1:
+        if path == client.ENDPOINTS["directions_candidates"][0]:
             return make_response({"error": "fail"}, status=500)
         return make_response([
             {"id": "1", "name": "Тэрапія"},
@@ -48,7 +103,44 @@ def test_discover_directions_selects_first_success(monkeypatch):
     assert endpoint == client.ENDPOINTS["directions_candidates"][1]
     assert [d["id"] for d in directions] == ["1", "2"]
     assert "OK" in message
-    assert len(calls) == 2
+    # Candidates are probed concurrently; the higher-priority ones always run.
+    probed = {path for _, path, _ in calls}
+    assert set(client.ENDPOINTS["directions_candidates"][:2]) <= probed
+
+
+def test_discover_directions_reuses_persisted_endpoint(monkeypatch):
+    calls = []
+    winner = client.ENDPOINTS["directions_candidates"][2]
+
+    def fake_api_get(base_url: str, path: str, params: dict, timeout: int = 20):
+        calls.append(path)
+        if path != winner:
+            return make_response({"error": "fail"}, status=404)
+        return make_response([{"id": "1", "name": "Тэрапія"}])
+
+    monkeypatch.setattr(client, "_api_get", fake_api_get)
+
+    assert client.discover_directions(client.BASE_URL_DEFAULT, token="abc")[0] == winner
+    assert client.endpoint_cache_path().exists()
+
+    # A fresh process only has the file: one request to the remembered endpoint.
+    client.invalidate_cache()
+    calls.clear()
+    assert client.discover_directions(client.BASE_URL_DEFAULT, token="abc")[0] == winner
+    assert calls == [winner]
+
+
+def test_warmup_loads_persisted_endpoint_without_requests(monkeypatch):
+    winner = client.ENDPOINTS["directions_candidates"][1]
+    client._remember_directions_endpoint(client.BASE_URL_DEFAULT, winner)
+    client.invalidate_cache()
+
+    def fail_api_get(*args: Any, **kwargs: Any):
+        raise AssertionError("warmup must not make requests")
+
+    monkeypatch.setattr(client, "_api_get", fail_api_get)
+    client.warmup()
+    assert client._CACHE.get(("directions_endpoint", client.BASE_URL_DEFAULT)) == winner
 
 
 def test_get_doctors_normalizes_response(monkeypatch):
@@ -63,6 +155,89 @@ def test_get_doctors_normalizes_response(monkeypatch):
     ]
 
 
+def test_normalizers_return_string_ids():
+    assert client._normalize_directions([{"id": 5, "name": "Тэрапія"}])[0]["id"] == "5"
+    assert [d["id"] for d in client._normalize_doctors([{"id": 7}, {"id": "7"}])] == ["7"]
+    assert client._normalize_services([{"serviceId": 12}])[0]["id"] == "12"
+    assert client._normalize_records([{"recordId": 99}])[0]["recordId"] == "99"
+
+
+def test_async_calls_use_threads_unless_a_client_scope_is_open(monkeypatch):
+    calls = []
+
+    def fake_api_get(base_url: str, path: str, params: dict, timeout: int = 20):
+        calls.append(path)
+        return make_response([{"id": "1", "name": "Доктар"}])
+
+    monkeypatch.setattr(client, "_api_get", fake_api_get)
+
+    async def scenario():
+        await client.get_doctors_async(client.BASE_URL_DEFAULT, "abc", "5")
+        assert client._async_client() is None
+        async with client.async_http_client():
+            owned = client._async_client()
+            async with client.async_http_client():
+                assert client._async_client() is owned
+        assert client._async_client() is None
+        return owned
+
+    owned = asyncio.run(scenario())
+
+    assert calls == [client.ENDPOINTS["doctors"]]
+    if client._use_async_http():
+        assert owned.is_closed
+
+
+def test_get_doctors_caches_per_token(monkeypatch):
+    calls = []
+
+    def fake_api_get(base_url: str, path: str, params: dict, timeout: int = 20):
+        calls.append(params["token"])
+        return make_response([{"id": "1", "name": "Доктар"}])
+
+    monkeypatch.setattr(client, "_api_get", fake_api_get)
+
+    first = client.get_doctors(client.BASE_URL_DEFAULT, "abc", "5")
+    again = client.get_doctors(client.BASE_URL_DEFAULT, token="abc", id_direction="5")
+    client.get_doctors(client.BASE_URL_DEFAULT, "other", "5")
+    assert again is first
+    assert calls == ["abc", "other"]
+
+    client.invalidate_cache("get_doctors")
+    client.get_doctors(client.BASE_URL_DEFAULT, "abc", "5")
+    assert calls == ["abc", "other", "abc"]
+
+
+def test_ttl_cache_sweeps_expired_then_evicts_oldest():
+    cache = client._TTLCache(max_entries=3)
+    cache.set(("a",), 1, ttl=0)
+    cache.set(("b",), 2, ttl=60)
+    cache.set(("c",), 3, ttl=60)
+    cache.set(("d",), 4, ttl=60)  # full: only the expired entry goes
+    assert [cache.get((k,)) for k in "bcd"] == [2, 3, 4]
+
+    cache.set(("e",), 5, ttl=60)  # full, nothing expired: oldest write goes
+    assert cache.get(("b",)) is client._MISSING
+    assert [cache.get((k,)) for k in "cde"] == [3, 4, 5]
+
+
+def test_get_doctors_async_shares_cache_with_sync(monkeypatch):
+    calls = []
+
+    def fake_api_get(base_url: str, path: str, params: dict, timeout: int = 20):
+        calls.append(path)
+        return make_response([{"id": "1", "name": "Доктар"}])
+
+    monkeypatch.setattr(client, "_api_get", fake_api_get)
+    monkeypatch.setattr(client, "_use_async_http", lambda: False)
+
+    doctors = asyncio.run(client.get_doctors_async(client.BASE_URL_DEFAULT, "abc", "5"))
+
+    assert doctors == [{"id": "1", "name": "Доктар", "raw": {"id": "1", "name": "Доктар"}}]
+    assert client.get_doctors(client.BASE_URL_DEFAULT, "abc", "5") is doctors
+    assert calls == [client.ENDPOINTS["doctors"]]
+
+
 def test_get_service_duration_handles_nested_dict(monkeypatch):
     def fake_api_get(base_url: str, path: str, params: dict, timeout: int = 20):
         assert params["idDirection"] == "5"
@@ -139,3 +314,41 @@ def test_get_schedule_normalizes_slots(monkeypatch):
     ]
 
 
+def test_parse_har_for_patient_collects_ids_and_fields(tmp_path):
+    har = {
+        "log": {
+            "entries": [
+                {"request": {"url": "https://x/patient?patientAPIId=12", "method": "GET"}},
+                {
+                    "request": {
+                        "url": "https://x/record/create",
+                        "method": "POST",
+                        "postData": {"text": "patient=44&Ins_name=Belgos&patientAPIId=44"},
+                    }
+                },
+            ]
+        }
+    }
+    har_path = tmp_path / "session.har"
+    har_path.write_text(json.dumps(har), encoding="utf-8")
+
+    result = client.parse_har_for_patient(str(har_path))
+
+    assert result == {
+        "patient_ids": ["12", "44"],
+        "ins_name": "Belgos",
+        "record_fields": ["patient", "Ins_name", "patientAPIId"],
+    }
+
+
+def test_parse_har_for_patient_reuses_result_until_file_changes(tmp_path):
+    har_path = tmp_path / "session.har"
+    entry = {"request": {"url": "https://x/patient?patientAPIId=12", "method": "GET"}}
+    har_path.write_text(json.dumps({"log": {"entries": [entry]}}), encoding="utf-8")
+
+    first = client.parse_har_for_patient(str(har_path))
+    assert client.parse_har_for_patient(str(har_path)) is first
+
+    entry["request"]["url"] = "https://x/patient?patientAPIId=1234"
+    har_path.write_text(json.dumps({"log": {"entries": [entry]}}), encoding="utf-8")
+    assert client.parse_har_for_patient(str(har_path))["patient_ids"] == ["1234"]
@@ -0,0 +1,92 @@
+import functools
+import pathlib
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+httpx = pytest.importorskip("httpx")
+chat_cli = pytest.importorskip("chat_cli")
+
+import amedis_client as client
+
+
+@pytest.fixture(autouse=True)
+def _clear_client_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AMEDIS_CACHE_DIR", str(tmp_path / "cache"))
+    client.invalidate_cache()
+    yield
+    client.invalidate_cache()
+
+
+def test_dialog_turns_share_one_httpx_client(monkeypatch, capsys):
+    requests_seen = []
+
+    def handler(request: "httpx.Request") -> "httpx.Response":
+        requests_seen.append(request.url.path)
+        return httpx.Response(200, json=[{"id": "7", "name": "Доктар"}])
+
+    async_client_cls = httpx.AsyncClient
+    monkeypatch.setattr(client, "HTTP_TRANSPORT", "requests")
+    monkeypatch.setattr(
+        client.httpx,
+        "AsyncClient",
+        functools.partial(async_client_cls, transport=httpx.MockTransport(handler)),
+    )
+    clients = []
+
+    class FakeRunner:
+        async def run_async(self, *, user_id, session_id, new_message):
+            clients.append(client._async_client())
+            direction = new_message.parts[0].text
+            doctors = await client.get_doctors_async(client.BASE_URL_DEFAULT, "abc", direction)
+            part = SimpleNamespace(text=doctors[0]["name"])
+            yield SimpleNamespace(error_code=None, content=SimpleNamespace(parts=[part]))
+
+    with chat_cli._dialog_loop() as loop:
+        for direction in ("5", "6"):
+            loop.run_until_complete(
+                chat_cli._print_agent_reply(
+                    FakeRunner(), user_id="u", session_id="s", message=direction
+                )
+            )
+        owned = clients[0]
+
+    assert isinstance(owned, async_client_cls)
+    assert clients == [owned, owned]
+    assert owned.is_closed
+    assert len(requests_seen) == 2
+    assert capsys.readouterr().out.count("Агент: Доктар") == 2
+
+
+def test_dialog_loop_dispatches_tools_to_acall(monkeypatch):
+    import agent
+
+    async def fake_get_schedule_async(base_url, token, doctor_id, start, end, service_id):
+        return [{"startAt": "2023-10-01 09:00", "endAt": "2023-10-01 09:30"}]
+
+    def fail_get_schedule(*args):
+        raise AssertionError("the sync path must not run inside the dialogue loop")
+
+    monkeypatch.setattr(client, "HTTP_TRANSPORT", "requests")
+    monkeypatch.setattr(client, "get_schedule_async", fake_get_schedule_async)
+    monkeypatch.setattr(client, "get_schedule", fail_get_schedule)
+    schedule = next(
+        tool for tool in agent._build_function_tools(agent.AgentSettings())
+        if tool.name == "schedule"
+    )
+    payload = {
+        "doctor_id": "42",
+        "service_id": "12",
+        "date_start": "01.10.2023",
+        "date_end": "07.10.2023",
+    }
+
+    with chat_cli._dialog_loop() as loop:
+        result = loop.run_until_complete(schedule.func(payload))
+
+    assert [slot["startAt"] for slot in result["slots"]] == ["2023-10-01 09:00"]
@@ -64,3 +64,23 @@ def test_ensure_gemini_token_rejects_empty_cli():
     with pytest.raises(ValueError):
         ensure_gemini_token("   ")
 
+
+def test_resolve_token_path_follows_env_changes(monkeypatch, tmp_path):
+    monkeypatch.delenv("AMEDIS_GEMINI_TOKEN_PATH", raising=False)
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "a"))
+    assert resolve_token_path() == tmp_path / "a" / "amagent" / "gemini_api_token"
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "b"))
+    assert resolve_token_path() == tmp_path / "b" / "amagent" / "gemini_api_token"
+
+
+def test_ensure_gemini_token_skips_rewriting_same_token(monkeypatch, tmp_path):
+    monkeypatch.delenv(GEMINI_API_KEY_ENV, raising=False)
+    path = tmp_path / "token.txt"
+    ensure_gemini_token("abc", persist=True, path=path)
+    os.utime(path, ns=(0, 0))
+
+    ensure_gemini_token("abc", persist=True, path=path)
+    assert path.stat().st_mtime_ns == 0
+
+    ensure_gemini_token("xyz", persist=True, path=path)
+    assert path.read_text(encoding="utf-8").strip() == "xyz"
@@ -1,5 +1,7 @@
+import asyncio
 import pathlib
 import sys
+from dataclasses import asdict
 
 import pytest
 import os
@@ -9,6 +11,7 @@ ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+import amedis_client as client
 import tools as t
 
 
@@ -16,8 +19,6 @@ def test_directions_tool_returns_items(monkeypatch):
     def fake_discover(base_url: str, token: str):
         return "/directions", [{"id": "1", "name": "Тэрапія"}, {"id": "2", "name": "Хірургія"}], "OK"
 
-    import amedis_client as client
-
     monkeypatch.setattr(client, "discover_directions", fake_discover)
 
     tool = t.DirectionsTool()
@@ -35,12 +36,10 @@ def test_doctors_tool_filters_and_maps(monkeypatch):
             {"name": "Без ID"},  # павінен быць адфільтраваны
         ]
 
-    import amedis_client as client
-
     monkeypatch.setattr(client, "get_doctors", fake_get_doctors)
 
     tool = t.DoctorsTool()
-    out = tool.call(t.DoctorsInput(direction_id="5"))
+    out = tool.call(t.DoctorsInput(direction_id="5", include_raw=True))
 
     assert len(out.doctors) == 1
     doc = out.doctors[0]
@@ -48,6 +47,9 @@ def test_doctors_tool_filters_and_maps(monkeypatch):
     assert doc.name == "Доктар Х"
     assert isinstance(doc.raw, dict)
 
+    # The backend payload is only attached on request.
+    assert tool.call(t.DoctorsInput(direction_id="5")).doctors[0].raw is None
+
 
 def test_services_tool_converts_duration(monkeypatch):
     def fake_get_services(base_url: str, token: str, id_direction: str):
@@ -57,8 +59,6 @@ def test_services_tool_converts_duration(monkeypatch):
             {"id": "14", "name": "Іншае", "duration": None, "raw": {"d": None}},
         ]
 
-    import amedis_client as client
-
     monkeypatch.setattr(client, "get_service_duration", fake_get_services)
 
     tool = t.ServicesTool()
@@ -71,6 +71,20 @@ def test_services_tool_converts_duration(monkeypatch):
     ]
 
 
+def test_resolver_matches_names_across_case_and_yo():
+    kb = {
+        "entities": {
+            "services": {"s1": {"service_name": "Удаление папиллом"}},
+            "doctors": {"d1": {"doctor_name": "Ёлкин Пётр"}},
+        },
+        "index": {},
+    }
+    resolver = t.Resolver(kb)
+
+    assert resolver.normalize("  УДАЛЕНИЕ\u00a0папиллом ") == {"kind": "service", "id": "s1"}
+    assert resolver.normalize("елкин петр") == {"kind": "doctor", "id": "d1"}
+
+
 def test_schedule_tool_returns_slots(monkeypatch):
     def fake_get_schedule(base_url: str, token: str, doctor_id: str, start: str, end: str, service_id: str | None):
         assert doctor_id == "42"
@@ -80,8 +94,6 @@ def test_schedule_tool_returns_slots(monkeypatch):
             {"startAt": "2023-10-01 10:00"},
         ]
 
-    import amedis_client as client
-
     monkeypatch.setattr(client, "get_schedule", fake_get_schedule)
 
     tool = t.ScheduleTool()
@@ -104,6 +116,28 @@ def test_schedule_tool_returns_slots(monkeypatch):
     ]
 
 
+def test_schedule_tool_acall_awaits_async_client(monkeypatch):
+    async def fake_get_schedule_async(base_url, token, doctor_id, start, end, service_id):
+        assert (doctor_id, service_id) == ("42", "12")
+        return [{"startAt": "2023-10-01 09:00", "endAt": "2023-10-01 09:30"}]
+
+    monkeypatch.setattr(client, "get_schedule_async", fake_get_schedule_async)
+
+    tool = t.ScheduleTool()
+    out = asyncio.run(
+        tool.acall(
+            t.ScheduleInput(
+                doctor_id="42",
+                service_id="12",
+                date_start="01.10.2023",
+                date_end="07.10.2023",
+            )
+        )
+    )
+
+    assert [s.startAt for s in out.slots] == ["2023-10-01 09:00"]
+
+
 def test_live_directions_tool_prints():
     token = os.environ.get("AMEDIS_TEST_TOKEN")
     if not token:
@@ -122,7 +156,7 @@ def test_live_doctors_tool_prints():
     base_url = os.environ.get("AMEDIS_BASE_URL")
     tool = t.DoctorsTool()
     out = tool.call(t.DoctorsInput(base_url=base_url, token=token, direction_id=direction))
-    print([d.model_dump() for d in out.doctors])
+    print([asdict(d) for d in out.doctors])
 
 
 def test_live_services_tool_prints():
@@ -133,7 +167,7 @@ def test_live_services_tool_prints():
     base_url = os.environ.get("AMEDIS_BASE_URL")
     tool = t.ServicesTool()
     out = tool.call(t.ServicesInput(base_url=base_url, token=token, direction_id=direction))
-    print([s.model_dump() for s in out.services])
+    print([asdict(s) for s in out.services])
 
 
 def test_live_schedule_tool_prints():
@@ -156,4 +190,4 @@ def test_live_schedule_tool_prints():
             date_end=end,
         )
     )
-    print([s.model_dump() for s in out.slots])
+    print([asdict(s) for s in out.slots])
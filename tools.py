@@ -2,16 +2,26 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
 import re
 import json
+import unicodedata
 import calendar
+from dataclasses import dataclass
 from datetime import date
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Annotated, Any, Dict, Final, FrozenSet, List, Optional, Sequence, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None  # the routing KB is parsed with the stdlib json module
 
 import amedis_client
+from amedis_client import BASE_URL_DEFAULT as _BASE_URL_DEFAULT
 
 # ---------------------------------------------------------------------------
 # Local routing KB (JSON) and simple resolver
@@ -21,17 +31,37 @@ import amedis_client
 ROUTING_JSON = "amedis_routing.json"
 USE_LOCAL_KB: bool = str(os.getenv("AMEDIS_USE_LOCAL_KB", "0")).strip().lower() in {"1", "true", "yes", "y"}
 KB: Dict[str, Any] | None = None
-try:
-    with open(ROUTING_JSON, "r", encoding="utf-8") as f:
-        KB = json.load(f)
-except Exception:
-    KB = None  # Fallback to remote API when KB is unavailable
+# Every KB consumer is gated on USE_LOCAL_KB, so skip parsing it otherwise.
+if USE_LOCAL_KB:
+    try:
+        with open(ROUTING_JSON, "rb") as f:
+            _kb_bytes = f.read()
+        try:
+            KB = orjson.loads(_kb_bytes) if orjson is not None else json.loads(_kb_bytes)
+        except ValueError:
+            # orjson is stricter (NaN, invalid UTF-8); retry leniently.
+            KB = json.loads(_kb_bytes.decode("utf-8", errors="replace"))
+        del _kb_bytes
+    except Exception:
+        KB = None  # Fallback to remote API when KB is unavailable
 
 # Quick references if KB is present
 ENT: Dict[str, Any] = KB.get("entities", {}) if KB else {}
 IDX: Dict[str, Any] = KB.get("index", {}) if KB else {}
 
 
+# After casefold "Ё" is "ё"; users often type it as "е".
+_YO_TO_E = str.maketrans({"ё": "е"})
+
+
+def _fold_name(text: str) -> str:
+    """Fold a KB name or user query for Unicode/case-insensitive matching."""
+
+    folded = unicodedata.normalize("NFKC", text).casefold().translate(_YO_TO_E)
+    # Collapse runs of (non-breaking) whitespace into single spaces
+    return " ".join(folded.split())
+
+
 class Resolver:
     """Simple resolver for the new KB structure (entities/index)."""
 
@@ -40,50 +70,116 @@ class Resolver:
         self.ent = kb.get("entities", {})
         self.idx = kb.get("index", {})
 
-        # Precompute lowercase name -> id maps
+        # Precompute folded name -> id maps
         self.service_name2id: Dict[str, str] = {
-            (v.get("service_name") or "").strip().lower(): sid
+            _fold_name(v["service_name"]): sid
             for sid, v in self.ent.get("services", {}).items()
             if isinstance(v, dict) and isinstance(v.get("service_name"), str)
         }
         self.direction_name2id: Dict[str, str] = {
-            (v.get("direction_name") or "").strip().lower(): did
+            _fold_name(v["direction_name"]): did
             for did, v in self.ent.get("directions", {}).items()
             if isinstance(v, dict) and isinstance(v.get("direction_name"), str)
         }
         self.doctor_name2id: Dict[str, str] = {
-            (v.get("doctor_name") or "").strip().lower(): did
+            _fold_name(v["doctor_name"]): did
             for did, v in self.ent.get("doctors", {}).items()
             if isinstance(v, dict) and isinstance(v.get("doctor_name"), str)
         }
 
+        # One flat text -> (kind, id) map for normalize(). Filled from the
+        # lowest to the highest precedence so later updates win: names before
+        # IDs, and doctor before direction before service within each group.
+        self._lookup: Dict[str, Tuple[str, str]] = {}
+        for kind, name2id in (
+            ("doctor", self.doctor_name2id),
+            ("direction", self.direction_name2id),
+            ("service", self.service_name2id),
+        ):
+            self._lookup.update((name, (kind, eid)) for name, eid in name2id.items())
+        for kind, key in (
+            ("doctor", "doctors"),
+            ("direction", "directions"),
+            ("service", "services"),
+        ):
+            self._lookup.update((eid, (kind, eid)) for eid in self.ent.get(key, {}))
+
+        # Flat single-hop views of the nested index sections. Values are frozen
+        # into tuples: callers only iterate them, so one allocation is shared.
+        by_service: Dict[str, Any] = self.idx.get("by_service", {})
+        self._service2doctors: Dict[str, Tuple[str, ...]] = {
+            sid: tuple((meta or {}).get("doctors", ())) for sid, meta in by_service.items()
+        }
+        self._service2directions: Dict[str, Tuple[str, ...]] = {
+            sid: tuple((meta or {}).get("directions", ())) for sid, meta in by_service.items()
+        }
+        self._direction2services: Dict[str, Tuple[str, ...]] = {
+            did: tuple((meta or {}).get("services", ()))
+            for did, meta in self.idx.get("by_direction", {}).items()
+        }
+        self._doctor2services: Dict[str, Tuple[str, ...]] = {
+            did: tuple(ids) for did, ids in self.idx.get("doctor_to_services", {}).items()
+        }
+        self._doctor2directions: Dict[str, Tuple[str, ...]] = {
+            did: tuple(ids) for did, ids in self.idx.get("doctor_to_directions", {}).items()
+        }
+
+        # Doctors reachable via each direction's services, first occurrence wins
+        self.direction2doctors: Dict[str, Tuple[str, ...]] = {
+            did: tuple(
+                dict.fromkeys(doc for sid in services for doc in self.doctors_for_service(sid))
+            )
+            for did, services in self._direction2services.items()
+        }
+
+    @functools.cached_property
+    def service_rows(self) -> Dict[str, Tuple[Optional[str], Optional[int]]]:
+        """``service_id -> (name, duration_minutes)``, computed once on first use."""
+
+        rows: Dict[str, Tuple[Optional[str], Optional[int]]] = {}
+        for sid, srv in self.ent.get("services", {}).items():
+            if not isinstance(srv, dict):
+                rows[sid] = (None, None)
+                continue
+            # Accept multiple possible keys, coerce to minutes
+            value = srv.get("duration_min")
+            if value is None:
+                value = srv.get("duration") or srv.get("duration_minutes")
+            rows[sid] = (srv.get("service_name"), _to_int_minutes(value))
+        return rows
+
+    @functools.cached_property
+    def doctor_names(self) -> Dict[str, Optional[str]]:
+        """``doctor_id -> doctor_name``, computed once on first use."""
+
+        return {
+            did: v.get("doctor_name") if isinstance(v, dict) else None
+            for did, v in self.ent.get("doctors", {}).items()
+        }
+
     def normalize(self, text: str) -> Optional[Dict[str, str]]:
-        t = (text or "").strip().lower()
+        t = _fold_name(text or "")
         if not t:
             return None
 
-        # Allow direct IDs
-        if t in self.ent.get("services", {}):
-            return {"kind": "service", "id": t}
-        if t in self.ent.get("directions", {}):
-            return {"kind": "direction", "id": t}
-        if t in self.ent.get("doctors", {}):
-            return {"kind": "doctor", "id": t}
-
-        # Match by names
-        if t in self.service_name2id:
-            return {"kind": "service", "id": self.service_name2id[t]}
-        if t in self.direction_name2id:
-            return {"kind": "direction", "id": self.direction_name2id[t]}
-        if t in self.doctor_name2id:
-            return {"kind": "doctor", "id": self.doctor_name2id[t]}
-        return None
+        # Direct IDs first, then names (see ``_lookup`` precedence above)
+        hit = self._lookup.get(t)
+        return {"kind": hit[0], "id": hit[1]} if hit else None
+
+    def doctors_for_service(self, service_id: str) -> Sequence[str]:
+        return self._service2doctors.get(service_id, ())
+
+    def directions_for_service(self, service_id: str) -> Sequence[str]:
+        return self._service2directions.get(service_id, ())
 
-    def doctors_for_service(self, service_id: str) -> List[str]:
-        return self.idx.get("by_service", {}).get(service_id, {}).get("doctors", [])
+    def services_for_direction(self, direction_id: str) -> Sequence[str]:
+        return self._direction2services.get(direction_id, ())
 
-    def services_for_direction(self, direction_id: str) -> List[str]:
-        return self.idx.get("by_direction", {}).get(direction_id, {}).get("services", [])
+    def services_for_doctor(self, doctor_id: str) -> Sequence[str]:
+        return self._doctor2services.get(doctor_id, ())
+
+    def directions_for_doctor(self, doctor_id: str) -> Sequence[str]:
+        return self._doctor2directions.get(doctor_id, ())
 
 
 RESOLVER: Resolver | None = Resolver(KB) if KB else None
@@ -99,21 +195,49 @@ def resolve_entities(query: str) -> dict:
     """
     if not RESOLVER or not USE_LOCAL_KB:
         return {"status": "not_found", "entities": []}
-    ent = RESOLVER.normalize(query)
-    if not ent:
+    # Key the cache on the folded form so spelling variants share an entry.
+    hit = _resolve_cached(_fold_name(query))
+    if hit is None:
         return {"status": "not_found", "entities": []}
 
-    hints: Dict[str, List[str]] = {}
+    # Rehydrate fresh containers so callers cannot mutate the cached entry.
+    (kind, eid), hints = hit
+    return {
+        "status": "success",
+        "entities": [{"kind": kind, "id": eid}],
+        "hints": {key: list(ids) for key, ids in hints},
+    }
+
+
+_Resolved = Tuple[Tuple[str, str], Tuple[Tuple[str, Tuple[str, ...]], ...]]
+
+
+@functools.lru_cache(maxsize=2048)
+def _resolve_cached(query: str) -> Optional[_Resolved]:
+    # The routing KB is read-only for the process lifetime; results are
+    # stored as tuples so a cache hit never shares mutable state.
+    ent = RESOLVER.normalize(query) if RESOLVER else None
+    if not ent:
+        return None
+
+    resolver: Resolver = RESOLVER  # type: ignore[assignment]
+    hints: Dict[str, Sequence[str]] = {}
     if ent["kind"] == "service":
-        hints["doctors"] = RESOLVER.doctors_for_service(ent["id"])  # type: ignore[arg-type]
+        hints["doctors"] = resolver.doctors_for_service(ent["id"])
         # Also provide directions that include this service
-        hints["directions"] = IDX.get("by_service", {}).get(ent["id"], {}).get("directions", [])
+        hints["directions"] = resolver.directions_for_service(ent["id"])
     elif ent["kind"] == "direction":
-        hints["services"] = RESOLVER.services_for_direction(ent["id"])  # type: ignore[arg-type]
+        hints["services"] = resolver.services_for_direction(ent["id"])
     elif ent["kind"] == "doctor":
-        hints["services"] = IDX.get("doctor_to_services", {}).get(ent["id"], [])
-        hints["directions"] = IDX.get("doctor_to_directions", {}).get(ent["id"], [])
-    return {"status": "success", "entities": [ent], "hints": hints}
+        hints["services"] = resolver.services_for_doctor(ent["id"])
+        hints["directions"] = resolver.directions_for_doctor(ent["id"])
+    return (ent["kind"], ent["id"]), tuple((key, tuple(ids)) for key, ids in hints.items())
+
+
+def clear_resolver_cache() -> None:
+    """Drop memoized entity lookups, e.g. after swapping the KB in tests."""
+
+    _resolve_cached.cache_clear()
 
 
 def check_availability(
@@ -144,29 +268,68 @@ def check_availability(
     return {"status": "success", "slots": slots}
 
 
-DEFAULT_GUEST_TOKEN = os.getenv(
-    "AMEDIS_GUEST_TOKEN",
-    "Q9j87S4FV12e86475e82V5d44S7c2c2bb_35",
-)
+# Trust boundary: ``*Input`` models validate LLM/user supplied arguments, while
+# result rows come from our own ``amedis_client`` normalizers and are built as
+# plain item dataclasses wrapped via ``model_construct`` to skip re-validating
+# data we produced ourselves.  Never construct models this way from untrusted
+# external input.
+
+_GUEST_TOKEN_FALLBACK: Final[str] = "Q9j87S4FV12e86475e82V5d44S7c2c2bb_35"
+
+
+@functools.lru_cache(maxsize=1)
+def _default_token() -> str:
+    """Return the guest token, reading ``AMEDIS_GUEST_TOKEN`` on first use."""
+
+    return os.environ.get("AMEDIS_GUEST_TOKEN", _GUEST_TOKEN_FALLBACK)
 
 
 class BaseToolInput(BaseModel):
+    # Shared by every ``*Input``; validators are built on first use, not at import.
+    model_config = ConfigDict(defer_build=True)
+
     base_url: Optional[str] = Field(
         default=None, description="Базавы URL backend (па змаўчанні — з агента)"
     )
     token: Optional[str] = Field(
-        default=DEFAULT_GUEST_TOKEN, description="Токен доступу (па змаўчанні — гасцявы)"
+        default_factory=_default_token, description="Токен доступу (па змаўчанні — гасцявы)"
+    )
+
+
+class _RawRowsInput(BaseToolInput):
+    include_raw: bool = Field(
+        default=False, description="Дадаць сыры адказ backend да кожнага элемента"
     )
 
 
-class DirectionItem(BaseModel):
-    id: str = Field(description="Ідэнтыфікатар напрамку")
-    name: Optional[str] = Field(default=None, description="Назва напрамку")
+def _backend_args(input: BaseToolInput) -> Tuple[str, str]:
+    """Return ``(base_url, token)`` for a tool input with defaults applied."""
+
+    return input.base_url or _BASE_URL_DEFAULT, input.token or _default_token()
+
+
+def prefer_acall() -> bool:
+    """Return True when tool ``acall`` variants should be awaited directly.
+
+    That is the case while the running loop owns an async HTTP client (see
+    ``amedis_client.async_http_client``); otherwise ``call`` in a worker
+    thread reuses the pooled keep-alive session.
+    """
+
+    return amedis_client.async_client_active()
+
+
+# Item rows are read-only payloads built in bulk, so they are slotted
+# dataclasses rather than models; pydantic still reads the Annotated
+# descriptions when the output model schema is generated.
+@dataclass(slots=True)
+class DirectionItem:
+    id: Annotated[str, Field(description="Ідэнтыфікатар напрамку")]
+    name: Annotated[Optional[str], Field(description="Назва напрамку")] = None
 
 
 class DirectionsInput(BaseToolInput):
-    base_url: Optional[str] = Field(default=None)
-    token: Optional[str] = Field(default=None)
+    pass
 
 
 class DirectionsOutput(BaseModel):
@@ -176,44 +339,76 @@ class DirectionsOutput(BaseModel):
     )
 
 
+# Tool converters always pass every output field, so the fields-set is
+# precomputed (and copied per call, as pydantic mutates it on assignment).
+_DIRECTIONS_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(DirectionsOutput.model_fields)
+
+
 class DirectionsTool:
+    __slots__ = ()
+
     name = "directions"
     description = "Атрымаць спіс напрамкаў прыёму (спецыяльнасцяў)."
 
     def call(self, input: DirectionsInput) -> DirectionsOutput:
         # If local KB is available, serve directions from it.
         if KB and USE_LOCAL_KB:
-            directions = ENT.get("directions", {})
-            items = [
-                DirectionItem(id=str(did), name=(meta or {}).get("direction_name"))
-                for did, meta in directions.items()
-                if did is not None
-            ]
-            return DirectionsOutput(endpoint_used="local_kb", directions=items)
+            return self._from_kb()
 
         # Fallback to remote API when KB is not available
-        base_url = getattr(input, "base_url", None) or amedis_client.BASE_URL_DEFAULT
-        token = getattr(input, "token", DEFAULT_GUEST_TOKEN)
-        endpoint, rows, _ = amedis_client.discover_directions(base_url, token)
+        endpoint, rows, _ = amedis_client.discover_directions(*_backend_args(input))
+        return self._from_rows(endpoint, rows)
+
+    async def acall(self, input: DirectionsInput) -> DirectionsOutput:
+        if KB and USE_LOCAL_KB:
+            return self._from_kb()
+        # Discovery fans out over its own thread pool, so it runs off the loop.
+        endpoint, rows, _ = await asyncio.to_thread(
+            amedis_client.discover_directions, *_backend_args(input)
+        )
+        return self._from_rows(endpoint, rows)
+
+    def warmup(self) -> None:
+        # The local KB needs no network; otherwise set up the session early.
+        if not (KB and USE_LOCAL_KB):
+            amedis_client.warmup(_BASE_URL_DEFAULT)
+
+    @staticmethod
+    def _from_kb() -> DirectionsOutput:
+        directions = ENT.get("directions", {})
+        items = [
+            DirectionItem(id=str(did), name=(meta or {}).get("direction_name"))
+            for did, meta in directions.items()
+            if did is not None
+        ]
+        return DirectionsOutput.model_construct(
+            _fields_set=set(_DIRECTIONS_OUT_FIELDS),
+            endpoint_used="local_kb",
+            directions=items,
+        )
+
+    @staticmethod
+    def _from_rows(endpoint: str, rows: List[Dict[str, Any]]) -> DirectionsOutput:
         items = [
-            DirectionItem(id=str(row.get("id")), name=row.get("name"))
+            DirectionItem(id=row["id"], name=row.get("name"))
             for row in rows
             if row.get("id") is not None
         ]
-        return DirectionsOutput(endpoint_used=endpoint, directions=items)
+        return DirectionsOutput.model_construct(
+            _fields_set=set(_DIRECTIONS_OUT_FIELDS),
+            endpoint_used=endpoint,
+            directions=items,
+        )
 
 
-class DoctorItem(BaseModel):
-    id: str = Field(description="Ідэнтыфікатар доктара")
-    name: Optional[str] = Field(default=None, description="Імя/прозвішча доктара")
-    raw: Dict[str, Any] | None = Field(
-        default=None, description="Сыры адказ backend для дадзенага доктара"
-    )
+@dataclass(slots=True)
+class DoctorItem:
+    id: Annotated[str, Field(description="Ідэнтыфікатар доктара")]
+    name: Annotated[Optional[str], Field(description="Імя/прозвішча доктара")] = None
+    raw: Annotated[Any, Field(description="Сыры адказ backend для дадзенага доктара")] = None
 
 
-class DoctorsInput(BaseToolInput):
-    base_url: Optional[str] = Field(default=None)
-    token: Optional[str] = Field(default=None)
+class DoctorsInput(_RawRowsInput):
     direction_id: Optional[str] = Field(
         default=None, description="Ідэнтыфікатар напрамку"
     )
@@ -225,64 +420,79 @@ class DoctorsOutput(BaseModel):
     )
 
 
+_DOCTORS_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(DoctorsOutput.model_fields)
+
+
 class DoctorsTool:
+    __slots__ = ()
+
     name = "doctors"
     description = "Атрымаць спіс доктараў у межах напрамку."
 
     def call(self, input: DoctorsInput) -> DoctorsOutput:
         # Prefer local KB if present
         if KB and USE_LOCAL_KB:
-            doctors_map: Dict[str, Any] = ENT.get("doctors", {})
-            doctor_ids: List[str]
-            if input.direction_id and RESOLVER:
-                # Resolve all services for the given direction, then doctors per service
-                services = RESOLVER.services_for_direction(str(input.direction_id))
-                agg: List[str] = []
-                for sid in services:
-                    agg.extend(RESOLVER.doctors_for_service(sid))
-                # Deduplicate while preserving order
-                seen = set()
-                doctor_ids = [d for d in agg if not (d in seen or seen.add(d))]
-            else:
-                doctor_ids = list(doctors_map.keys())
-
-            doctors = [
-                DoctorItem(
-                    id=str(did),
-                    name=(doctors_map.get(did) or {}).get("doctor_name"),
-                    raw=doctors_map.get(did),
-                )
-                for did in doctor_ids
-                if did is not None
-            ]
-            return DoctorsOutput(doctors=doctors)
+            return self._from_kb(input)
 
         # Fallback to remote API
-        base_url = getattr(input, "base_url", None) or amedis_client.BASE_URL_DEFAULT
-        token = getattr(input, "token", DEFAULT_GUEST_TOKEN)
+        base_url, token = _backend_args(input)
         rows = amedis_client.get_doctors(base_url, token, input.direction_id)
+        return self._from_rows(rows, input.include_raw)
+
+    async def acall(self, input: DoctorsInput) -> DoctorsOutput:
+        if KB and USE_LOCAL_KB:
+            return self._from_kb(input)
+        base_url, token = _backend_args(input)
+        rows = await amedis_client.get_doctors_async(base_url, token, input.direction_id)
+        return self._from_rows(rows, input.include_raw)
+
+    @staticmethod
+    def _from_kb(input: DoctorsInput) -> DoctorsOutput:
+        doctors_map: Dict[str, Any] = ENT.get("doctors", {})
+        names = RESOLVER.doctor_names if RESOLVER else {}
+        doctor_ids: Sequence[str]
+        if input.direction_id and RESOLVER:
+            # Doctors of all services in the direction, precomputed at KB load
+            doctor_ids = RESOLVER.direction2doctors.get(str(input.direction_id), ())
+        else:
+            doctor_ids = list(names)
+
+        doctors = [
+            DoctorItem(
+                id=str(did),
+                name=names.get(did),
+                raw=doctors_map.get(did) if input.include_raw else None,
+            )
+            for did in doctor_ids
+            if did is not None
+        ]
+        return DoctorsOutput.model_construct(_fields_set=set(_DOCTORS_OUT_FIELDS), doctors=doctors)
+
+    @staticmethod
+    def _from_rows(rows: List[Dict[str, Any]], include_raw: bool) -> DoctorsOutput:
         doctors = [
-            DoctorItem(id=str(row.get("id")), name=row.get("name"), raw=row.get("raw"))
+            DoctorItem(
+                id=row["id"],
+                name=row.get("name"),
+                raw=row.get("raw") if include_raw else None,
+            )
             for row in rows
             if row.get("id") is not None
         ]
-        return DoctorsOutput(doctors=doctors)
+        return DoctorsOutput.model_construct(_fields_set=set(_DOCTORS_OUT_FIELDS), doctors=doctors)
 
 
-class ServiceItem(BaseModel):
-    id: str = Field(description="ServiceId паслугі")
-    name: Optional[str] = Field(default=None, description="Назва паслугі")
-    duration_minutes: Optional[int] = Field(
-        default=None, description="Працягласць у хвілінах"
-    )
-    raw: Dict[str, Any] | None = Field(
-        default=None, description="Сыры адказ backend для дадзенай паслугі"
-    )
+@dataclass(slots=True)
+class ServiceItem:
+    id: Annotated[str, Field(description="ServiceId паслугі")]
+    name: Annotated[Optional[str], Field(description="Назва паслугі")] = None
+    duration_minutes: Annotated[
+        Optional[int], Field(description="Працягласць у хвілінах")
+    ] = None
+    raw: Annotated[Any, Field(description="Сыры адказ backend для дадзенай паслугі")] = None
 
 
-class ServicesInput(BaseToolInput):
-    base_url: Optional[str] = Field(default=None)
-    token: Optional[str] = Field(default=None)
+class ServicesInput(_RawRowsInput):
     direction_id: Optional[str] = Field(
         default=None, description="Ідэнтыфікатар напрамку"
     )
@@ -294,65 +504,94 @@ class ServicesOutput(BaseModel):
     )
 
 
+_SERVICES_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(ServicesOutput.model_fields)
+
+
+# KB services listed by the index but missing from the entities table
+_NO_SERVICE_ROW: Final[Tuple[None, None]] = (None, None)
+
+
 class ServicesTool:
+    __slots__ = ()
+
     name = "services"
     description = "Паказаць спіс паслуг для напрамку і іх працягласць."
 
     def call(self, input: ServicesInput) -> ServicesOutput:
         # Prefer local KB if present
         if KB and USE_LOCAL_KB:
-            services_map: Dict[str, Any] = ENT.get("services", {})
-            # If a direction is provided, filter services by it
-            if input.direction_id and RESOLVER:
-                service_ids = RESOLVER.services_for_direction(str(input.direction_id))
-            else:
-                service_ids = list(services_map.keys())
-
-            def _duration_from_service(srv: Dict[str, Any]) -> Optional[int]:
-                # Accept multiple possible keys, coerce to minutes
-                if not isinstance(srv, dict):
-                    return None
-                value = srv.get("duration_min")
-                if value is None:
-                    value = srv.get("duration") or srv.get("duration_minutes")
-                return _to_int_minutes(value)
-
-            services = [
-                ServiceItem(
-                    id=str(sid),
-                    name=(services_map.get(sid) or {}).get("service_name"),
-                    duration_minutes=_duration_from_service(services_map.get(sid, {})),
-                    raw=services_map.get(sid),
-                )
-                for sid in service_ids
-                if sid is not None
-            ]
-            return ServicesOutput(services=services)
+            return self._from_kb(input)
 
         # Fallback to remote API
-        base_url = getattr(input, "base_url", None) or amedis_client.BASE_URL_DEFAULT
-        token = getattr(input, "token", DEFAULT_GUEST_TOKEN)
-        rows = amedis_client.get_service_duration(
+        base_url, token = _backend_args(input)
+        rows = amedis_client.get_service_duration(base_url, token, input.direction_id)
+        return self._from_rows(rows, input.include_raw)
+
+    async def acall(self, input: ServicesInput) -> ServicesOutput:
+        if KB and USE_LOCAL_KB:
+            return self._from_kb(input)
+        base_url, token = _backend_args(input)
+        rows = await amedis_client.get_service_duration_async(
             base_url, token, input.direction_id
         )
+        return self._from_rows(rows, input.include_raw)
+
+    @staticmethod
+    def _from_kb(input: ServicesInput) -> ServicesOutput:
+        services_map: Dict[str, Any] = ENT.get("services", {})
+        rows = RESOLVER.service_rows if RESOLVER else {}
+        # If a direction is provided, filter services by it
+        if input.direction_id and RESOLVER:
+            service_ids = RESOLVER.services_for_direction(str(input.direction_id))
+        else:
+            service_ids = list(rows)
+
         services = [
             ServiceItem(
-                id=str(row.get("id")),
+                id=str(sid),
+                name=name,
+                duration_minutes=duration,
+                raw=services_map.get(sid) if input.include_raw else None,
+            )
+            for sid in service_ids
+            if sid is not None
+            for name, duration in (rows.get(sid, _NO_SERVICE_ROW),)
+        ]
+        return ServicesOutput.model_construct(
+            _fields_set=set(_SERVICES_OUT_FIELDS),
+            services=services,
+        )
+
+    @staticmethod
+    def _from_rows(rows: List[Dict[str, Any]], include_raw: bool) -> ServicesOutput:
+        services = [
+            ServiceItem(
+                id=row["id"],
                 name=row.get("name"),
                 duration_minutes=_to_int_minutes(row.get("duration")),
-                raw=row.get("raw"),
+                raw=row.get("raw") if include_raw else None,
             )
             for row in rows
             if row.get("id") is not None
         ]
-        return ServicesOutput(services=services)
+        return ServicesOutput.model_construct(
+            _fields_set=set(_SERVICES_OUT_FIELDS),
+            services=services,
+        )
 
 
 def _to_int_minutes(value: Any) -> Optional[int]:
     """Helper to coerce raw duration values to integer minutes."""
 
+    # Backend durations are almost always plain ints (or None), so exact class
+    # checks run first; subclasses such as bool fall through to isinstance.
+    cls = value.__class__
+    if cls is int:
+        return value
     if value is None:
         return None
+    if cls is float:
+        return int(round(value))
     if isinstance(value, int):
         return value
     if isinstance(value, float):
@@ -367,19 +606,16 @@ def _to_int_minutes(value: Any) -> Optional[int]:
         return None
 
 
-class SlotItem(BaseModel):
-    startAt: str = Field(description="Дата і час пачатку слоту")
-    endAt: Optional[str] = Field(
-        default=None, description="Дата і час заканчэння слоту, калі вядома"
-    )
-    raw: Dict[str, Any] | None = Field(
-        default=None, description="Сыры адказ backend для слоту"
-    )
+@dataclass(slots=True)
+class SlotItem:
+    startAt: Annotated[str, Field(description="Дата і час пачатку слоту")]
+    endAt: Annotated[
+        Optional[str], Field(description="Дата і час заканчэння слоту, калі вядома")
+    ] = None
+    raw: Annotated[Any, Field(description="Сыры адказ backend для слоту")] = None
 
 
-class ScheduleInput(BaseToolInput):
-    base_url: Optional[str] = Field(default=None)
-    token: Optional[str] = Field(default=None)
+class ScheduleInput(_RawRowsInput):
     doctor_id: str = Field(description="Ідэнтыфікатар доктара")
     service_id: Optional[str] = Field(
         default=None, description="Ідэнтыфікатар паслугі"
@@ -394,56 +630,62 @@ class ScheduleOutput(BaseModel):
     )
 
 
+_SCHEDULE_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(ScheduleOutput.model_fields)
+
+
 class ScheduleTool:
+    __slots__ = ()
+
     name = "schedule"
     description = "Атрымаць вольныя часавыя слоты для доктара і паслугі."
 
     def call(self, input: ScheduleInput) -> ScheduleOutput:
-        base_url = getattr(input, "base_url", None) or amedis_client.BASE_URL_DEFAULT
-        token = getattr(input, "token", DEFAULT_GUEST_TOKEN)
+        rows = amedis_client.get_schedule(*self._args(input))
+        return self._from_rows(rows, input.include_raw)
+
+    async def acall(self, input: ScheduleInput) -> ScheduleOutput:
+        rows = await amedis_client.get_schedule_async(*self._args(input))
+        return self._from_rows(rows, input.include_raw)
+
+    def warmup(self) -> None:
+        # Schedules always come from the API, so prepare the session at startup.
+        amedis_client.warmup(_BASE_URL_DEFAULT)
+
+    @staticmethod
+    def _args(input: ScheduleInput) -> Tuple[Any, ...]:
+        base_url, token = _backend_args(input)
         start_norm, end_norm = _normalize_date_range(input.date_start, input.date_end)
-        rows = amedis_client.get_schedule(
-            base_url,
-            token,
-            input.doctor_id,
-            start_norm,
-            end_norm,
-            input.service_id,
-        )
+        return base_url, token, input.doctor_id, start_norm, end_norm, input.service_id
+
+    @staticmethod
+    def _from_rows(rows: List[Dict[str, Any]], include_raw: bool) -> ScheduleOutput:
         slots = [
             SlotItem(
                 startAt=row.get("startAt"),
                 endAt=row.get("endAt"),
-                raw=row.get("raw"),
+                raw=row.get("raw") if include_raw else None,
             )
             for row in rows
             if row.get("startAt")
         ]
-        return ScheduleOutput(slots=slots)
+        return ScheduleOutput.model_construct(_fields_set=set(_SCHEDULE_OUT_FIELDS), slots=slots)
+
+
+_PHRASES_NEXT: Final[FrozenSet[str]] = frozenset(
+    {"наступны месяц", "следующий месяц", "next month"}
+)
+_PHRASES_THIS: Final[FrozenSet[str]] = frozenset({"гэты месяц", "текущий месяц", "this month"})
 
 
 def _normalize_date_range(date_start: str, date_end: str) -> Tuple[str, str]:
     s = (date_start or "").strip().lower()
     e = (date_end or "").strip().lower()
 
-    phrases_next = {"наступны месяц", "следующий месяц", "next month"}
-    phrases_this = {"гэты месяц", "текущий месяц", "this month"}
+    if s in _PHRASES_NEXT or e in _PHRASES_NEXT:
+        return _month_range("next", date.today().toordinal())
 
-    if s in phrases_next or e in phrases_next:
-        today = date.today()
-        y = today.year + (1 if today.month == 12 else 0)
-        m = 1 if today.month == 12 else today.month + 1
-        first = date(y, m, 1)
-        last_day = calendar.monthrange(y, m)[1]
-        last = date(y, m, last_day)
-        return first.strftime("%d.%m.%Y"), last.strftime("%d.%m.%Y")
-
-    if s in phrases_this or e in phrases_this:
-        today = date.today()
-        first = date(today.year, today.month, 1)
-        last_day = calendar.monthrange(today.year, today.month)[1]
-        last = date(today.year, today.month, last_day)
-        return first.strftime("%d.%m.%Y"), last.strftime("%d.%m.%Y")
+    if s in _PHRASES_THIS or e in _PHRASES_THIS:
+        return _month_range("this", date.today().toordinal())
 
     if _is_year_month(s) and (not e or _is_year_month(e)):
         y, m = map(int, s.split("-"))
@@ -457,16 +699,33 @@ def _normalize_date_range(date_start: str, date_end: str) -> Tuple[str, str]:
     return ds, de
 
 
+@functools.lru_cache(maxsize=8)
+def _month_range(kind: str, ordinal: int) -> Tuple[str, str]:
+    """Return the ``DD.MM.YYYY`` bounds of this/next month for day ``ordinal``."""
+
+    today = date.fromordinal(ordinal)
+    y, m = today.year, today.month
+    if kind == "next":
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    last_day = calendar.monthrange(y, m)[1]
+    return date(y, m, 1).strftime("%d.%m.%Y"), date(y, m, last_day).strftime("%d.%m.%Y")
+
+
+_YM_RE = re.compile(r"\d{4}-\d{2}")
+_DDMMYYYY_RE = re.compile(r"\d{2}\.\d{2}\.\d{4}")
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
 def _is_year_month(text: str) -> bool:
-    return bool(re.fullmatch(r"\d{4}-\d{2}", text))
+    return _YM_RE.fullmatch(text) is not None
 
 
 def _to_ddmmyyyy(text: str) -> Optional[str]:
     if not text:
         return None
-    if re.fullmatch(r"\d{2}\.\d{2}\.\d{4}", text):
+    if _DDMMYYYY_RE.fullmatch(text):
         return text
-    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+    if _ISO_DATE_RE.fullmatch(text):
         y, m, d = map(int, text.split("-"))
         try:
             dt = date(y, m, d)
@@ -478,8 +737,6 @@ def _to_ddmmyyyy(text: str) -> Optional[str]:
 
 
 class CreateRecordInput(BaseToolInput):
-    base_url: Optional[str] = Field(default=None)
-    token: Optional[str] = Field(default=None)
     doctor_id: str = Field(description="Ідэнтыфікатар доктара")
     patient_id: str = Field(description="patientAPIId пацыента")
     startAt: str = Field(description="Дата і час пачатку слоту")
@@ -509,14 +766,29 @@ class CreateRecordOutput(BaseModel):
     )
 
 
+_CREATE_RECORD_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(CreateRecordOutput.model_fields)
+
+
 class CreateRecordTool:
+    __slots__ = ()
+
     name = "create_record"
     description = "Стварыць новы запіс да ўрача на аснове выбранага слоту."
 
     def call(self, input: CreateRecordInput) -> CreateRecordOutput:
-        base_url = getattr(input, "base_url", None) or amedis_client.BASE_URL_DEFAULT
-        token = getattr(input, "token", DEFAULT_GUEST_TOKEN)
-        result = amedis_client.create_record(
+        args = self._args(input)
+        return self._from_result(amedis_client.create_record(*args, extra=input.extra))
+
+    async def acall(self, input: CreateRecordInput) -> CreateRecordOutput:
+        args = self._args(input)
+        return self._from_result(
+            await amedis_client.create_record_async(*args, extra=input.extra)
+        )
+
+    @staticmethod
+    def _args(input: CreateRecordInput) -> Tuple[Any, ...]:
+        base_url, token = _backend_args(input)
+        return (
             base_url,
             token,
             input.doctor_id,
@@ -525,9 +797,12 @@ class CreateRecordTool:
             input.endAt,
             input.description,
             input.insurer,
-            extra=input.extra,
         )
-        return CreateRecordOutput(
+
+    @staticmethod
+    def _from_result(result: Dict[str, Any]) -> CreateRecordOutput:
+        return CreateRecordOutput.model_construct(
+            _fields_set=set(_CREATE_RECORD_OUT_FIELDS),
             status_code=result.get("status_code", 0),
             data=result.get("data"),
             error=result.get("error"),
@@ -535,29 +810,22 @@ class CreateRecordTool:
         )
 
 
-class ListRecordsInput(BaseToolInput):
-    base_url: Optional[str] = Field(default=None)
-    token: Optional[str] = Field(default=None)
+class ListRecordsInput(_RawRowsInput):
     patient_id: str = Field(description="patientAPIId пацыента")
 
 
-class PatientRecord(BaseModel):
-    recordId: str = Field(description="Ідэнтыфікатар запісу")
-    doctor: Optional[str] = Field(
-        default=None, description="Імя або спецыялізацыя доктара"
-    )
-    startAt: Optional[str] = Field(
-        default=None, description="Час пачатку прыёму"
-    )
-    endAt: Optional[str] = Field(
-        default=None, description="Час заканчэння прыёму"
-    )
-    status: Optional[str] = Field(
-        default=None, description="Статус запісу на баку backend"
-    )
-    raw: Dict[str, Any] | None = Field(
-        default=None, description="Сыры адказ backend"
-    )
+@dataclass(slots=True)
+class PatientRecord:
+    recordId: Annotated[str, Field(description="Ідэнтыфікатар запісу")]
+    doctor: Annotated[
+        Optional[str], Field(description="Імя або спецыялізацыя доктара")
+    ] = None
+    startAt: Annotated[Optional[str], Field(description="Час пачатку прыёму")] = None
+    endAt: Annotated[Optional[str], Field(description="Час заканчэння прыёму")] = None
+    status: Annotated[
+        Optional[str], Field(description="Статус запісу на баку backend")
+    ] = None
+    raw: Annotated[Any, Field(description="Сыры адказ backend")] = None
 
 
 class ListRecordsOutput(BaseModel):
@@ -566,34 +834,46 @@ class ListRecordsOutput(BaseModel):
     )
 
 
+_LIST_RECORDS_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(ListRecordsOutput.model_fields)
+
+
 class ListRecordsTool:
+    __slots__ = ()
+
     name = "list_records"
     description = "Паказаць усе запісы пацыента."
 
     def call(self, input: ListRecordsInput) -> ListRecordsOutput:
-        base_url = getattr(input, "base_url", None) or amedis_client.BASE_URL_DEFAULT
-        token = getattr(input, "token", DEFAULT_GUEST_TOKEN)
-        rows = amedis_client.list_patient_records(
-            base_url, token, input.patient_id
-        )
+        base_url, token = _backend_args(input)
+        rows = amedis_client.list_patient_records(base_url, token, input.patient_id)
+        return self._from_rows(rows, input.include_raw)
+
+    async def acall(self, input: ListRecordsInput) -> ListRecordsOutput:
+        base_url, token = _backend_args(input)
+        rows = await amedis_client.list_patient_records_async(base_url, token, input.patient_id)
+        return self._from_rows(rows, input.include_raw)
+
+    @staticmethod
+    def _from_rows(rows: List[Dict[str, Any]], include_raw: bool) -> ListRecordsOutput:
         records = [
             PatientRecord(
-                recordId=str(row.get("recordId")),
+                recordId=row["recordId"],
                 doctor=row.get("doctor"),
                 startAt=row.get("startAt"),
                 endAt=row.get("endAt"),
                 status=row.get("status"),
-                raw=row.get("raw"),
+                raw=row.get("raw") if include_raw else None,
             )
             for row in rows
             if row.get("recordId") is not None
         ]
-        return ListRecordsOutput(records=records)
+        return ListRecordsOutput.model_construct(
+            _fields_set=set(_LIST_RECORDS_OUT_FIELDS),
+            records=records,
+        )
 
 
 class CancelRecordInput(BaseToolInput):
-    base_url: Optional[str] = Field(default=None)
-    token: Optional[str] = Field(default=None)
     record_id: str = Field(description="Ідэнтыфікатар запісу")
     cancel_status: str = Field(
         default="CAN", description="Статус, на які трэба змяніць запіс"
@@ -610,17 +890,33 @@ class CancelRecordOutput(BaseModel):
     )
 
 
+_CANCEL_RECORD_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(CancelRecordOutput.model_fields)
+
+
 class CancelRecordTool:
+    __slots__ = ()
+
     name = "cancel_record"
     description = "Адмяніць існы запіс па recordId."
 
     def call(self, input: CancelRecordInput) -> CancelRecordOutput:
-        base_url = getattr(input, "base_url", None) or amedis_client.BASE_URL_DEFAULT
-        token = getattr(input, "token", DEFAULT_GUEST_TOKEN)
-        result = amedis_client.cancel_record(
-            base_url, token, input.record_id, input.cancel_status
+        base_url, token = _backend_args(input)
+        return self._from_result(
+            amedis_client.cancel_record(base_url, token, input.record_id, input.cancel_status)
+        )
+
+    async def acall(self, input: CancelRecordInput) -> CancelRecordOutput:
+        base_url, token = _backend_args(input)
+        return self._from_result(
+            await amedis_client.cancel_record_async(
+                base_url, token, input.record_id, input.cancel_status
+            )
         )
-        return CancelRecordOutput(
+
+    @staticmethod
+    def _from_result(result: Dict[str, Any]) -> CancelRecordOutput:
+        return CancelRecordOutput.model_construct(
+            _fields_set=set(_CANCEL_RECORD_OUT_FIELDS),
             status_code=result.get("status_code", 0),
             data=result.get("data"),
             sent=result.get("sent", {}),
@@ -643,20 +939,52 @@ class HarAutofillOutput(BaseModel):
     )
 
 
+_HAR_AUTOFILL_OUT_FIELDS: Final[FrozenSet[str]] = frozenset(HarAutofillOutput.model_fields)
+
+
 class HarAutofillTool:
+    __slots__ = ()
+
     name = "har_autofill"
     description = "Прайсці па HAR-файле і знайсці patientAPIId/Ins_name."
 
     def call(self, input: HarAutofillInput) -> HarAutofillOutput:
-        data = amedis_client.parse_har_for_patient(input.har_path)
-        return HarAutofillOutput(
+        return self._from_result(amedis_client.parse_har_for_patient(input.har_path))
+
+    async def acall(self, input: HarAutofillInput) -> HarAutofillOutput:
+        # HAR captures can be large; parsing is CPU-bound and stays off the loop.
+        data = await asyncio.to_thread(amedis_client.parse_har_for_patient, input.har_path)
+        return self._from_result(data)
+
+    @staticmethod
+    def _from_result(data: Dict[str, Any]) -> HarAutofillOutput:
+        return HarAutofillOutput.model_construct(
+            _fields_set=set(_HAR_AUTOFILL_OUT_FIELDS),
             patient_ids=[str(pid) for pid in data.get("patient_ids", [])],
             insurer_guess=data.get("ins_name"),
             record_fields=list(data.get("record_fields", [])),
         )
 
 
+# Tool instances are stateless; one shared instance per tool, keyed by ``name``.
+TOOLS: Final[Dict[str, Any]] = {
+    tool.name: tool
+    for tool in (
+        DirectionsTool(),
+        DoctorsTool(),
+        ServicesTool(),
+        ScheduleTool(),
+        CreateRecordTool(),
+        ListRecordsTool(),
+        CancelRecordTool(),
+        HarAutofillTool(),
+    )
+}
+
+
 __all__ = [
+    "TOOLS",
+    "prefer_acall",
     "DirectionsTool",
     "DoctorsTool",
     "ServicesTool",